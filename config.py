@@ -2,33 +2,33 @@
 配置管理模組 - 處理應用程序配置和環境變量
 """
 import os
-from typing import Optional, Dict, Any
-from pydantic_settings import BaseSettings
-from pydantic import Field
-
-# 加載環境變量
-from dotenv import load_dotenv
-load_dotenv()  # 從 .env 文件加載變量
+from types import MappingProxyType
+from typing import Optional, Any, Mapping
+from pydantic import PrivateAttr
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class AppSettings(BaseSettings):
     """應用程序配置設置"""
     
+    # 欄位名稱直接對應環境變量（不分大小寫），.env 由 pydantic-settings 讀取
+    model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
+    
     # API 密鑰
-    gemini_api_key: Optional[str] = Field(None, env="GEMINI_API_KEY")
-    notion_api_key: Optional[str] = Field(None, env="NOTION_API_KEY")
-    notion_database_id: Optional[str] = Field(None, env="NOTION_DATABASE_ID")
+    gemini_api_key: Optional[str] = None
+    notion_api_key: Optional[str] = None
+    notion_database_id: Optional[str] = None
     
     # 存儲配置
-    gcs_bucket_name: Optional[str] = Field(None, env="GCS_BUCKET_NAME")
-    google_application_credentials: Optional[str] = Field(None, env="GOOGLE_APPLICATION_CREDENTIALS")
+    gcs_bucket_name: Optional[str] = None
+    google_application_credentials: Optional[str] = None
     
     # GCP 部署配置
-    gcp_project_id: Optional[str] = Field(None, env="GCP_PROJECT_ID")
-    service_name: Optional[str] = Field(None, env="SERVICE_NAME")
-    gcp_region: Optional[str] = Field(None, env="GCP_REGION")
+    gcp_project_id: Optional[str] = None
+    service_name: Optional[str] = None
+    gcp_region: Optional[str] = None
     
     # 輸出平台配置
-    output_platform: str = Field("gcs", env="OUTPUT_PLATFORM")
+    output_platform: str = "gcs"
     
     # 應用程序配置
     app_name: str = "Sunday School Weekly Report Generator"
@@ -38,63 +38,98 @@ class AppSettings(BaseSettings):
     # 報告配置
     report_title_template: str = "🌈✨ {title} 🧸🎈<br> {date} "
     
+    # Gemini 微批次配置（同時到達的請求合併為一次 API 調用，1 表示不合併）
+    gemini_batch_max_size: int = 1
+    gemini_batch_max_wait_ms: int = 30
+    # 相同內容的報告（及 Gemini 格式驗證結果）在此秒數內直接重用，0 表示不快取
+    gemini_cache_ttl: int = 0
+    
+    # 格式驗證配置（默認只使用本地規則修復，啟用後再交由 Gemini 檢查）
+    format_validator_use_gemini: bool = False
+    
+    # 報告列表在此秒數內重用上次的查詢結果，0 表示每次都重新列出
+    report_list_cache_ttl: int = 5
+    
+    # 模板配置（開發時可設為 True，修改模板後無需重啟）
+    template_auto_reload: bool = False
+    
     # 服務器配置
     host: str = "0.0.0.0"
     port: int = 8000
-    domain: Optional[str] = Field(None, env="DOMAIN")
+    domain: Optional[str] = None
+    # Uvicorn 工作進程數，與 uvicorn CLI 一樣讀取 WEB_CONCURRENCY
+    web_concurrency: int = min(os.cpu_count() or 1, 4)
     
-    class Config:
-        env_file = ".env"
-        env_file_encoding = "utf-8"
+    # 設置載入後不會改變的狀態，於 model_post_init 中計算一次
+    _settings_status: Mapping[str, bool] = PrivateAttr()
+    _api_keys_status: Mapping[str, bool] = PrivateAttr()
+    _fastapi_settings: Mapping[str, Any] = PrivateAttr()
+    
+    def model_post_init(self, __context: Any) -> None:
+        """預先計算配置狀態，並以唯讀映射保存"""
+        self._settings_status = MappingProxyType({
+            "gemini_api_key": bool(self.gemini_api_key),
+            "notion_api_key": bool(self.notion_api_key),
+            "notion_database_id": bool(self.notion_database_id),
+            "gcs_bucket_name": bool(self.gcs_bucket_name),
+            "google_application_credentials": bool(self.google_application_credentials)
+        })
+        self._api_keys_status = MappingProxyType({
+            "gemini_api_key": bool(self.gemini_api_key),
+            "notion_api_key": bool(self.notion_api_key),
+            "notion_database_id": bool(self.notion_database_id)
+        })
+        self._fastapi_settings = MappingProxyType({
+            "title": self.app_name,
+            "description": self.app_description,
+            "version": self.app_version
+        })
         
-    def validate_settings(self) -> Dict[str, bool]:
+    def validate_settings(self) -> Mapping[str, bool]:
         """
         驗證配置設置
         
         Returns:
-            Dict[str, bool]: 配置驗證結果
+            Mapping[str, bool]: 配置驗證結果（唯讀）
         """
-        return {
-            "gemini_api_key": bool(self.gemini_api_key),
-            "notion_api_key": bool(self.notion_api_key),
-            "notion_database_id": bool(self.notion_database_id),
-            "gcs_bucket_name": bool(self.gcs_bucket_name),
-            "google_application_credentials": bool(self.google_application_credentials)
-        }
+        return self._settings_status
         
-    def get_api_keys_status(self) -> Dict[str, bool]:
+    def get_api_keys_status(self) -> Mapping[str, bool]:
         """
         獲取 API 密鑰狀態
         
         Returns:
-            Dict[str, bool]: API 密鑰狀態
+            Mapping[str, bool]: API 密鑰狀態（唯讀）
         """
-        return {
-            "gemini_api_key": bool(self.gemini_api_key),
-            "notion_api_key": bool(self.notion_api_key),
-            "notion_database_id": bool(self.notion_database_id)
-        }
+        return self._api_keys_status
         
-    def get_fastapi_settings(self) -> Dict[str, Any]:
+    def get_fastapi_settings(self) -> Mapping[str, Any]:
         """
         獲取 FastAPI 應用程序設置
         
         Returns:
-            Dict[str, Any]: FastAPI 設置
+            Mapping[str, Any]: FastAPI 設置（唯讀）
         """
-        return {
-            "title": self.app_name,
-            "description": self.app_description,
-            "version": self.app_version
-        }
+        return self._fastapi_settings
 
 # 創建全局設置實例
 settings = AppSettings()
 
-# 導出常用配置變量
-GEMINI_API_KEY = settings.gemini_api_key
-NOTION_API_KEY = settings.notion_api_key
-NOTION_DATABASE_ID = settings.notion_database_id
-GCS_BUCKET_NAME = settings.gcs_bucket_name
-GOOGLE_APPLICATION_CREDENTIALS = settings.google_application_credentials
-OUTPUT_PLATFORM = settings.output_platform 
\ No newline at end of file
+# Google Cloud 客戶端只從 os.environ 讀取憑證路徑，僅在 .env 中設置時需同步過去
+if settings.google_application_credentials:
+    os.environ.setdefault("GOOGLE_APPLICATION_CREDENTIALS", settings.google_application_credentials)
+
+# 導出常用配置變量，透過模組級 __getattr__ 代理到 settings，確保取得的是最新值
+_SETTINGS_ALIASES = {
+    "GEMINI_API_KEY": "gemini_api_key",
+    "NOTION_API_KEY": "notion_api_key",
+    "NOTION_DATABASE_ID": "notion_database_id",
+    "GCS_BUCKET_NAME": "gcs_bucket_name",
+    "GOOGLE_APPLICATION_CREDENTIALS": "google_application_credentials",
+    "OUTPUT_PLATFORM": "output_platform",
+}
+
+def __getattr__(name: str) -> Any:
+    if name in _SETTINGS_ALIASES:
+        return getattr(settings, _SETTINGS_ALIASES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,8 +1,9 @@
 """
 依賴注入模組 - 處理服務初始化和依賴注入
 """
+import asyncio
 import logging
-from typing import Optional, Tuple, Dict, Any
+from typing import Optional, Tuple
 from functools import lru_cache
 
 from fastapi import Depends
@@ -22,129 +23,113 @@ from utils.common.logging_utils import get_logger
 # 配置日誌
 logger = get_logger("dependencies")
 
-class ServiceContainer:
-    """服務容器類，負責管理所有服務實例"""
-    
-    def __init__(self):
-        self._services: Dict[str, Any] = {}
-        
-    def get_or_create(self, service_key: str, factory_func) -> Any:
-        """
-        獲取或創建服務實例
-        
-        Args:
-            service_key: 服務的唯一標識
-            factory_func: 創建服務的工廠函數
-            
-        Returns:
-            Any: 服務實例
-        """
-        if service_key not in self._services:
-            self._services[service_key] = factory_func()
-        return self._services[service_key]
-    
-    def clear(self):
-        """清除所有服務實例"""
-        self._services.clear()
-
-# 創建全局服務容器實例
-service_container = ServiceContainer()
-
+@lru_cache(maxsize=None)
 def get_gemini_service() -> Optional[GeminiService]:
     """獲取 Gemini 服務實例"""
-    def create_service():
-        try:
-            return GeminiService(api_key=settings.gemini_api_key)
-        except Exception as e:
-            logger.error(f"Failed to initialize Gemini service: {str(e)}")
-            return None
-    
-    return service_container.get_or_create("gemini", create_service)
+    try:
+        return GeminiService(
+            api_key=settings.gemini_api_key,
+            max_batch_size=settings.gemini_batch_max_size,
+            max_batch_wait=settings.gemini_batch_max_wait_ms / 1000,
+            cache_ttl=settings.gemini_cache_ttl
+        )
+    except Exception as e:
+        logger.error("Failed to initialize Gemini service: %s", e)
+        return None
 
+@lru_cache(maxsize=None)
 def get_notion_service() -> Optional[NotionService]:
     """獲取 Notion 服務實例"""
-    def create_service():
-        try:
-            service = NotionService(api_key=settings.notion_api_key)
-            service.database_id = settings.notion_database_id
-            return service
-        except Exception as e:
-            logger.error(f"Failed to initialize Notion service: {str(e)}")
-            return None
-    
-    return service_container.get_or_create("notion", create_service)
+    try:
+        return NotionService(api_key=settings.notion_api_key, database_id=settings.notion_database_id)
+    except Exception as e:
+        logger.error("Failed to initialize Notion service: %s", e)
+        return None
 
+@lru_cache(maxsize=None)
 def get_format_validator_service() -> Optional[FormatValidatorService]:
     """獲取格式驗證服務實例"""
-    def create_service():
-        try:
-            return FormatValidatorService(api_key=settings.gemini_api_key)
-        except Exception as e:
-            logger.error(f"Failed to initialize Format Validator service: {str(e)}")
-            return None
-    
-    return service_container.get_or_create("format_validator", create_service)
+    try:
+        return FormatValidatorService(
+            api_key=settings.gemini_api_key,
+            use_gemini=settings.format_validator_use_gemini,
+            cache_ttl=settings.gemini_cache_ttl
+        )
+    except Exception as e:
+        logger.error("Failed to initialize Format Validator service: %s", e)
+        return None
 
+@lru_cache(maxsize=None)
 def get_storage_service() -> Optional[StorageService]:
     """獲取存儲服務實例"""
-    def create_service():
-        try:
-            return StorageService()
-        except Exception as e:
-            logger.warning(f"Failed to initialize Storage service: {str(e)}")
-            logger.warning("Application will continue without GCS storage capabilities")
-            return None
-    
-    return service_container.get_or_create("storage", create_service)
+    try:
+        return StorageService()
+    except Exception as e:
+        logger.warning("Failed to initialize Storage service: %s", e)
+        logger.warning("Application will continue without GCS storage capabilities")
+        return None
 
+@lru_cache(maxsize=None)
 def get_file_service() -> Optional[FileService]:
     """獲取文件服務實例"""
-    def create_service():
-        try:
-            return FileService()
-        except Exception as e:
-            logger.error(f"Failed to initialize File service: {str(e)}")
-            return None
-    
-    return service_container.get_or_create("file", create_service)
+    try:
+        return FileService()
+    except Exception as e:
+        logger.error("Failed to initialize File service: %s", e)
+        return None
 
+@lru_cache(maxsize=None)
 def get_output_platform(
     notion_service: Optional[NotionService] = Depends(get_notion_service),
     storage_service: Optional[StorageService] = Depends(get_storage_service)
 ) -> Optional[OutputPlatformInterface]:
     """獲取輸出平台實例"""
-    def create_platform():
-        platform_type = str(settings.output_platform).lower()
-        
-        if platform_type == "notion" and notion_service:
-            return NotionPlatform(notion_service)
-        elif platform_type == "gcs" and storage_service:
-            return GCSPlatform(storage_service)
-        else:
-            raise ValueError(f"Invalid or unavailable platform type: {platform_type}")
+    platform_type = str(settings.output_platform).lower()
     
-    return service_container.get_or_create("output_platform", create_platform)
+    if platform_type == "notion" and notion_service:
+        return NotionPlatform(notion_service)
+    elif platform_type == "gcs" and storage_service:
+        return GCSPlatform(storage_service)
+    else:
+        raise ValueError(f"Invalid or unavailable platform type: {platform_type}")
 
+@lru_cache(maxsize=None)
 def get_report_service(
     gemini_service: Optional[GeminiService] = Depends(get_gemini_service),
     output_platform: Optional[OutputPlatformInterface] = Depends(get_output_platform),
     format_validator_service: Optional[FormatValidatorService] = Depends(get_format_validator_service)
 ) -> Optional[ReportService]:
     """獲取報告服務實例"""
-    def create_service():
-        if not all([gemini_service, output_platform, format_validator_service]):
-            logger.error("Required services for ReportService are not available")
-            return None
-            
-        service = ReportService(
-            gemini_service=gemini_service,
-            output_platform=output_platform,
-            format_validator_service=format_validator_service
-        )
-        logger.info("Report service initialized successfully")
-        return service
+    if not all([gemini_service, output_platform, format_validator_service]):
+        logger.error("Required services for ReportService are not available")
+        return None
+        
+    service = ReportService(
+        gemini_service=gemini_service,
+        output_platform=output_platform,
+        format_validator_service=format_validator_service
+    )
+    logger.info("Report service initialized successfully")
+    return service
+
+def _resolve_report_service(
+    gemini_service: Optional[GeminiService],
+    notion_service: Optional[NotionService],
+    format_validator_service: Optional[FormatValidatorService],
+    storage_service: Optional[StorageService]
+) -> Optional[ReportService]:
+    """
+    使用已解析的服務實例建立報告服務
     
-    return service_container.get_or_create("report", create_service)
+    FastAPI 以關鍵字參數呼叫依賴函數，這裡也必須使用相同的關鍵字參數，
+    lru_cache 才會命中同一個快取項目，避免重複建立輸出平台和報告服務。
+    """
+    output_platform = get_output_platform(notion_service=notion_service, storage_service=storage_service)
+    return get_report_service(
+        gemini_service=gemini_service,
+        output_platform=output_platform,
+        format_validator_service=format_validator_service
+    )
 
 def get_all_services() -> Tuple[Optional[GeminiService], Optional[NotionService], Optional[FormatValidatorService], Optional[StorageService], Optional[ReportService], Optional[FileService]]:
     """獲取所有服務實例"""
@@ -153,6 +138,19 @@ def get_all_services() -> Tuple[Optional[GeminiService], Optional[NotionService]
     format_validator_service = get_format_validator_service()
     storage_service = get_storage_service()
     file_service = get_file_service()
-    report_service = get_report_service(gemini_service, get_output_platform(notion_service, storage_service), format_validator_service)
+    report_service = _resolve_report_service(gemini_service, notion_service, format_validator_service, storage_service)
+    
+    return gemini_service, notion_service, format_validator_service, storage_service, report_service, file_service
+
+async def init_all_services() -> Tuple[Optional[GeminiService], Optional[NotionService], Optional[FormatValidatorService], Optional[StorageService], Optional[ReportService], Optional[FileService]]:
+    """並行初始化所有服務實例，啟動時間取決於最慢的單一服務"""
+    gemini_service, notion_service, format_validator_service, storage_service, file_service = await asyncio.gather(
+        asyncio.to_thread(get_gemini_service),
+        asyncio.to_thread(get_notion_service),
+        asyncio.to_thread(get_format_validator_service),
+        asyncio.to_thread(get_storage_service),
+        asyncio.to_thread(get_file_service)
+    )
+    report_service = _resolve_report_service(gemini_service, notion_service, format_validator_service, storage_service)
     
-    return gemini_service, notion_service, format_validator_service, storage_service, report_service, file_service 
\ No newline at end of file
+    return gemini_service, notion_service, format_validator_service, storage_service, report_service, file_service
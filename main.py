@@ -2,63 +2,88 @@
 主應用程序模組 - 初始化 FastAPI 應用程序並包含所有路由
 """
 import logging
+from pathlib import Path
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 
 # 導入配置和依賴
 from config import settings
-from dependencies import get_all_services
+from dependencies import init_all_services, get_notion_service
 from routes import api_router
+from routes.web_routes import preload_templates
 from utils.common.logging_utils import get_logger
 
 # 配置日誌
 logger = get_logger("main")
 
-# 初始化 FastAPI 應用程序
-app = FastAPI(**settings.get_fastapi_settings())
+# 初始化 FastAPI 應用程序（JSON 響應默認使用 orjson 序列化）
+app = FastAPI(**settings.get_fastapi_settings(), default_response_class=ORJSONResponse)
+
+# 允許的來源和 HTTP 方法，模組載入時建立一次
+ALLOWED_ORIGINS = (
+    "https://sundayhub.jumido.tw",
+    "http://sundayhub.jumido.tw",
+    "https://storage.googleapis.com"  # 如果通過 GCS 默認域名訪問
+)
+ALLOWED_METHODS = ("GET", "POST", "OPTIONS")  # 只允許必要的 HTTP 方法
 
 # 設置 CORS
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=[
-        "https://sundayhub.jumido.tw",
-        "http://sundayhub.jumido.tw",
-        "https://storage.googleapis.com"  # 如果通過 GCS 默認域名訪問
-    ],
+    allow_origins=ALLOWED_ORIGINS,
     allow_credentials=True,
-    allow_methods=["GET", "POST", "OPTIONS"],  # 只允許必要的 HTTP 方法
+    allow_methods=ALLOWED_METHODS,
     allow_headers=["*"],
 )
 
-# 設置靜態文件
-app.mount("/static", StaticFiles(directory="static"), name="static")
+# 壓縮 1KB 以上的響應（報告、編輯表單等 HTML 頁面）
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=6)
+
+# 設置靜態文件（目錄不存在時不掛載）
+if (static_dir := Path("static")).is_dir():
+    app.mount("/static", StaticFiles(directory=str(static_dir)), name="static")
+else:
+    logger.warning("Static directory not found, /static will not be served")
 
-# 初始化服務
-try:
-    # 初始化日誌
+# 服務在啟動事件中初始化，導入 main 時不會建立任何 SDK 客戶端
+@app.on_event("startup")
+async def init_services():
+    """應用啟動時檢查配置並並行初始化所有服務"""
     logger.info("Application starting...")
     
     # 檢查配置
     config_validation = settings.validate_settings()
-    for key, value in config_validation.items():
-        if not value:
-            logger.warning(f"Environment variable {key.upper()} is not set. Please set it in the .env file")
+    missing = [key.upper() for key, value in config_validation.items() if not value]
+    if missing:
+        logger.warning("Environment variables not set: %s. Please set them in the .env file", ", ".join(missing))
     
-    # 初始化所有服務
-    gemini_service, notion_service, format_validator_service, storage_service, report_service, file_service = get_all_services()
-    
-    # 檢查關鍵服務是否可用
-    if not gemini_service:
-        logger.error("Gemini service initialization failed")
-    if not notion_service:
-        logger.error("Notion service initialization failed")
-    if not report_service:
-        logger.error("Report service initialization failed")
-    
-except Exception as e:
-    logger.error(f"Error during initialization: {str(e)}")
-    logger.exception(e)
+    try:
+        # 預先編譯模板
+        preload_templates()
+        
+        gemini_service, notion_service, format_validator_service, storage_service, report_service, file_service = await init_all_services()
+        
+        # 檢查關鍵服務是否可用
+        if not gemini_service:
+            logger.error("Gemini service initialization failed")
+        if not notion_service:
+            logger.error("Notion service initialization failed")
+        if not report_service:
+            logger.error("Report service initialization failed")
+        
+    except Exception as e:
+        logger.error("Error during initialization: %s", e)
+        logger.exception(e)
+
+@app.on_event("shutdown")
+async def close_services():
+    """應用關閉時釋放外部 API 的連接池"""
+    notion_service = get_notion_service()
+    if notion_service:
+        notion_service.api_client.close()
 
 # 包含所有路由
 app.include_router(api_router)
@@ -66,4 +91,5 @@ app.include_router(api_router)
 # 啟動應用程序
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host=settings.host, port=settings.port)
+    # 多進程模式需以 "模組:屬性" 字符串傳入應用
+    uvicorn.run("main:app", host=settings.host, port=settings.port, workers=settings.web_concurrency)
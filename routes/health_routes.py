@@ -1,6 +1,9 @@
 """
 健康檢查路由模組
 """
+from functools import lru_cache
+from typing import Any, Dict
+
 from fastapi import APIRouter, Depends
 
 from config import settings
@@ -13,14 +16,15 @@ logger = get_logger("health_routes")
 # 創建路由器
 router = APIRouter()
 
-@router.get("/health")
-async def health_check():
-    """
-    健康檢查端點，用於監控應用程序狀態。
-    返回有關應用程序及其依賴項的狀態信息。
+@lru_cache(maxsize=1)
+def _get_health_body() -> Dict[str, Any]:
     """
-    logger.info("Health check requested")
+    構建健康檢查響應內容。
+    服務實例與配置在啟動後不會改變，因此只在首次請求時計算一次。
     
+    Returns:
+        Dict[str, Any]: 健康檢查響應內容
+    """
     # 獲取服務實例
     gemini_service = get_gemini_service()
     notion_service = get_notion_service()
@@ -28,7 +32,7 @@ async def health_check():
     storage_service = get_storage_service()
     
     # 檢查 API 密鑰是否已設置
-    api_keys_status = settings.get_api_keys_status()
+    api_keys_status = dict(settings.get_api_keys_status())
     
     # 檢查服務是否已初始化
     services_status = {
@@ -46,4 +50,15 @@ async def health_check():
         "version": settings.app_version,
         "api_keys": api_keys_status,
         "services": services_status
-    } 
\ No newline at end of file
+    }
+
+@router.get("/health")
+async def health_check():
+    """
+    健康檢查端點，用於監控應用程序狀態。
+    返回有關應用程序及其依賴項的狀態信息。
+    """
+    # 監控探針會頻繁調用，使用 debug 級別避免刷屏
+    logger.debug("Health check requested")
+    
+    return _get_health_body()
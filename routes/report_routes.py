@@ -1,9 +1,11 @@
 """
 報告路由模組 - 處理報告生成相關的端點
 """
-from typing import List, Optional
+import asyncio
+import hashlib
+from typing import Dict, List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
 
 from pydantic import BaseModel
 from utils.common.logging_utils import get_logger
@@ -15,13 +17,16 @@ logger = get_logger("report_routes")
 # 創建路由器
 router = APIRouter()
 
+# 進行中的報告生成任務，相同請求並發到達時共用同一個任務，避免重複調用 Gemini
+_inflight: Dict[str, asyncio.Task] = {}
+
 # 定義 API 的請求模型
 class ReportRequest(BaseModel):
     content: str
     image_paths: Optional[List[str]] = []
     report_date: Optional[str] = None
 
-@router.post("/generate-report", response_class=JSONResponse)
+@router.post("/generate-report")
 async def generate_report_api(
     report_request: ReportRequest,
     report_service = Depends(get_report_service)
@@ -34,12 +39,12 @@ async def generate_report_api(
         report_service: 報告服務實例
         
     Returns:
-        JSONResponse: 包含生成報告結果的 JSON 響應
+        Dict: 包含生成報告結果的 JSON 響應
         
     Raises:
         HTTPException: 如果服務不可用或生成報告時發生錯誤
     """
-    logger.info(f"Received API request to generate report")
+    logger.info("Received API request to generate report")
     
     try:
         # 檢查服務是否可用
@@ -49,12 +54,26 @@ async def generate_report_api(
                 detail="Required services are not available"
             )
             
-        # 生成報告
-        result = report_service.generate_full_report(
-            content=report_request.content,
-            report_date=report_request.report_date,
-            image_paths=report_request.image_paths
-        )
+        # 相同內容、日期與圖片的請求共用同一個進行中的任務
+        key = hashlib.blake2b(
+            report_request.model_dump_json().encode(), digest_size=16
+        ).hexdigest()
+        task = _inflight.get(key)
+        if task is None:
+            # 生成報告（Gemini 與發布平台皆為同步 SDK，放到線程池執行以免阻塞事件循環）
+            task = asyncio.ensure_future(run_in_threadpool(
+                report_service.generate_full_report,
+                content=report_request.content,
+                report_date=report_request.report_date,
+                image_paths=report_request.image_paths
+            ))
+            _inflight[key] = task
+            task.add_done_callback(lambda _: _inflight.pop(key, None))
+        else:
+            logger.info("Identical report request already in progress, awaiting its result")
+        
+        # shield 確保單個客戶端斷線時不會取消其他等待者共用的任務
+        result = await asyncio.shield(task)
         
         # 返回結果
         return {
@@ -64,7 +83,7 @@ async def generate_report_api(
         }
         
     except Exception as e:
-        logger.error(f"Error generating report: {str(e)}")
+        logger.error("Error generating report: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, 
             detail=f"Failed to generate report: {str(e)}"
@@ -1,16 +1,18 @@
 """
 Web 路由模組 - 處理 Web 界面相關的端點
 """
+from functools import lru_cache
 from typing import List, Optional
 from fastapi import APIRouter, Depends, Request, Form, UploadFile, HTTPException, status, BackgroundTasks
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
 from fastapi.templating import Jinja2Templates
-import markdown
-from bs4 import BeautifulSoup
+from jinja2 import FileSystemBytecodeCache
 
+from config import settings
 from utils.common.logging_utils import get_logger
 from dependencies import get_report_service, get_file_service
-from services.report_service import ReportService
+from services.report_service import ReportService, DEFAULT_REPORT_TITLE
 from services.file_service import FileService
 from services.platforms.gcs_platform import GCSPlatform
 
@@ -20,8 +22,28 @@ logger = get_logger("web_routes")
 # 創建路由器
 router = APIRouter()
 
-# 設置模板
+# 設置模板，生產環境下不再逐次檢查模板文件是否更新
 templates = Jinja2Templates(directory="templates")
+templates.env.auto_reload = settings.template_auto_reload
+# 模板數量固定，改用不限大小的緩存（等同 cache_size=-1），已編譯模板不會被淘汰
+templates.env.cache = {}
+# 編譯後的模板字節碼緩存到臨時目錄，多個 worker 及重啟後可直接載入，無需重新解析
+templates.env.bytecode_cache = FileSystemBytecodeCache()
+
+# 啟動時預先編譯的模板
+PRELOAD_TEMPLATES = ("index.html", "success.html", "error.html", "edit.html")
+
+def preload_templates() -> None:
+    """預先編譯常用模板，避免每個 worker 的首個請求承擔模板解析成本"""
+    for name in PRELOAD_TEMPLATES:
+        templates.get_template(name)
+    _get_empty_index_body()
+    logger.info("Preloaded %s templates", len(PRELOAD_TEMPLATES))
+
+@lru_cache(maxsize=1)
+def _get_empty_index_body() -> bytes:
+    """沒有任何報告時的主頁內容固定不變，只渲染一次"""
+    return templates.get_template("index.html").render(reports=[]).encode("utf-8")
 
 @router.get("/", response_class=HTMLResponse)
 async def root(
@@ -42,9 +64,12 @@ async def root(
     reports = []
     if report_service:
         try:
-            reports = report_service.list_reports()
+            reports = await run_in_threadpool(report_service.list_reports)
         except Exception as e:
-            logger.error(f"Failed to list reports: {str(e)}")
+            logger.error("Failed to list reports: %s", e)
+    
+    if not reports:
+        return HTMLResponse(content=_get_empty_index_body())
     
     return templates.TemplateResponse(
         "index.html", 
@@ -77,7 +102,7 @@ async def list_reports(
         )
     
     try:
-        reports = report_service.list_reports()
+        reports = await run_in_threadpool(report_service.list_reports)
         # 確保每個報告都有必要的欄位
         formatted_reports = []
         for report in reports:
@@ -89,7 +114,7 @@ async def list_reports(
             })
         return {"reports": formatted_reports}
     except Exception as e:
-        logger.error(f"Failed to list reports: {str(e)}")
+        logger.error("Failed to list reports: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="無法獲取報告列表"
@@ -101,7 +126,7 @@ async def submit_form(
     background_tasks: BackgroundTasks,
     report_date: str = Form(...),
     content: str = Form(...),
-    title: str = Form("主日學週報"),
+    title: str = Form(DEFAULT_REPORT_TITLE),
     images: list[UploadFile] = None,
     report_service: Optional[ReportService] = Depends(get_report_service),
     file_service: FileService = Depends(get_file_service)
@@ -125,10 +150,7 @@ async def submit_form(
     Raises:
         HTTPException: 如果服務不可用或處理表單時發生錯誤
     """
-    logger.info("Form submission received")
-    logger.info(f"Report date: {report_date}")
-    logger.info(f"Content length: {len(content)} characters")
-    logger.info(f"Number of uploaded images: {len(images) if images else 0}")
+    logger.info("Form submission received: date=%s content_len=%d images=%d", report_date, len(content), len(images) if images else 0)
     
     # 檢查服務是否可用
     if not report_service:
@@ -148,19 +170,25 @@ async def submit_form(
     report_content = []
     error_message = None
     temp_image_paths = []
+    stream_images = []
     
     try:
-        # 處理圖片
+        # 處理圖片：存儲服務可用時在生成報告的同時直接串流到雲端，否則先保存為臨時文件
         if images:
-            temp_image_paths = await file_service.save_multiple_files(images)
-            logger.info(f"Saved {len(temp_image_paths)} temporary images")
+            if report_service.can_stream_images():
+                stream_images = images
+            else:
+                temp_image_paths = await file_service.save_multiple_files(images)
+                logger.info("Saved %s temporary images", len(temp_image_paths))
         
-        # 生成報告
-        result = report_service.generate_full_report(
+        # 生成報告（Gemini 與發布平台皆為同步 SDK，放到線程池執行以免阻塞事件循環）
+        result = await run_in_threadpool(
+            report_service.generate_full_report,
             content=content,
             report_date=report_date,
             image_paths=temp_image_paths,
-            title=title
+            title=title,
+            images=stream_images
         )
         
         if not result["success"]:
@@ -173,9 +201,9 @@ async def submit_form(
         # 添加背景任務以清理臨時文件
         background_tasks.add_task(file_service.clean_up_files, temp_image_paths)
         
-        logger.info(f"Successfully created report page: {page_url}")
+        logger.info("Successfully created report page: %s", page_url)
         
-        # 返回成功頁面
+        # 返回成功頁面：在 try 內完成渲染，模板出錯時返回錯誤頁面而不是截斷的 200 響應
         return templates.TemplateResponse(
             "success.html",
             {
@@ -188,10 +216,10 @@ async def submit_form(
         )
         
     except Exception as e:
-        logger.error(f"Error processing form: {str(e)}")
+        logger.error("Error processing form: %s", e)
         
-        # 清理臨時文件
-        file_service.clean_up_files(temp_image_paths)
+        # 在背景任務中清理臨時文件，不阻塞錯誤頁面的返回
+        background_tasks.add_task(file_service.clean_up_files, temp_image_paths)
         
         error_message = f"處理失敗: {str(e)}"
         return templates.TemplateResponse(
@@ -220,7 +248,7 @@ async def delete_report(
     Returns:
         RedirectResponse: 重定向到主頁面
     """
-    logger.info(f"Deleting report: {report_path}")
+    logger.info("Deleting report: %s", report_path)
     
     # 檢查服務是否可用
     if not report_service:
@@ -236,18 +264,18 @@ async def delete_report(
     
     try:
         # 使用 report_service 刪除報告
-        result = report_service.delete_report(report_path)
+        result = await run_in_threadpool(report_service.delete_report, report_path)
         
         if not result["success"]:
             raise Exception("Failed to delete report")
         
-        logger.info(f"Successfully deleted report: {report_path}")
+        logger.info("Successfully deleted report: %s", report_path)
         
         # 重定向到主頁面
         return RedirectResponse(url="/", status_code=303)
         
     except Exception as e:
-        logger.error(f"Error deleting report: {str(e)}")
+        logger.error("Error deleting report: %s", e)
         
         error_message = f"刪除失敗: {str(e)}"
         return templates.TemplateResponse(
@@ -276,7 +304,7 @@ async def edit_report_form(
     Returns:
         HTMLResponse: 包含編輯表單的 HTML 響應
     """
-    logger.info(f"Editing report: {report_path}")
+    logger.info("Editing report: %s", report_path)
     
     # 檢查服務是否可用
     if not report_service:
@@ -292,7 +320,7 @@ async def edit_report_form(
     
     try:
         # 使用 report_service 獲取報告編輯信息
-        report_data = report_service.get_report_for_editing(report_path)
+        report_data = await run_in_threadpool(report_service.get_report_for_editing, report_path)
         
         # 返回編輯表單
         return templates.TemplateResponse(
@@ -304,7 +332,7 @@ async def edit_report_form(
         )
         
     except Exception as e:
-        logger.error(f"Error getting report for editing: {str(e)}")
+        logger.error("Error getting report for editing: %s", e)
         
         error_message = f"獲取報告失敗: {str(e)}"
         return templates.TemplateResponse(
@@ -337,7 +365,7 @@ async def update_report(
     Returns:
         RedirectResponse: 重定向到主頁面
     """
-    logger.info(f"Updating report: {report_path}")
+    logger.info("Updating report: %s", report_path)
     
     # 檢查服務是否可用
     if not report_service:
@@ -365,7 +393,7 @@ async def update_report(
     
     try:
         # 使用 report_service 更新報告
-        result = report_service.update_report(report_path, title, content)
+        result = await run_in_threadpool(report_service.update_report, report_path, title, content)
         
         if not result["success"]:
             raise Exception("Failed to update report")
@@ -374,7 +402,7 @@ async def update_report(
         return RedirectResponse(url="/", status_code=303)
         
     except Exception as e:
-        logger.error(f"Error updating report: {str(e)}")
+        logger.error("Error updating report: %s", e)
         
         error_message = f"更新報告失敗: {str(e)}"
         return templates.TemplateResponse(
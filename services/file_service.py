@@ -2,16 +2,30 @@
 文件處理服務 - 處理文件上傳、保存和清理
 """
 import os
-import uuid
+import shutil
+import asyncio
 import logging
 from pathlib import Path
 from typing import List, Optional
 
 from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
 from utils.common.logging_utils import get_logger
 
 logger = get_logger("file_service")
 
+# 上傳文件寫入磁碟時每次讀取的大小 (1 MiB)
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+# 小於此大小的上傳文件（Starlette 已保存在內存中）一次讀出並以單次系統調用寫入
+SMALL_FILE_THRESHOLD = 1 << 20
+
+# 臨時文件的打開方式：僅當前用戶可讀寫，且不被子進程繼承
+_TEMP_FILE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_CLOEXEC", 0) | getattr(os, "O_BINARY", 0)
+
+# 同時寫入磁碟的上傳文件數上限，避免突發流量耗盡文件描述符
+MAX_CONCURRENT_SAVES = 8
+
 class FileService:
     """處理文件上傳、保存和清理的服務"""
     
@@ -24,7 +38,9 @@ class FileService:
         """
         self.temp_dir = temp_dir or os.path.join(os.getcwd(), "temp")
         os.makedirs(self.temp_dir, exist_ok=True)
-        logger.info(f"File service initialized with temp directory: {self.temp_dir}")
+        # 信號量需在事件循環中建立，於首次保存時初始化
+        self._save_semaphore: Optional[asyncio.Semaphore] = None
+        logger.info("File service initialized with temp directory: %s", self.temp_dir)
     
     async def save_upload_file(self, upload_file: UploadFile) -> Optional[str]:
         """
@@ -46,22 +62,49 @@ class FileService:
         try:
             # 創建唯一文件名以避免衝突
             file_extension = Path(upload_file.filename).suffix
-            unique_filename = f"temp_{uuid.uuid4()}{file_extension}"
+            unique_filename = f"temp_{os.urandom(8).hex()}{file_extension}"
             
             # 使用絕對路徑保存臨時檔案
             file_path = os.path.join(self.temp_dir, unique_filename)
             
-            # 保存文件
-            with open(file_path, "wb") as buffer:
-                buffer.write(await upload_file.read())
+            # 在線程池中分塊複製到磁碟，避免一次將整個文件讀入內存，也不阻塞事件循環
+            if self._save_semaphore is None:
+                self._save_semaphore = asyncio.Semaphore(MAX_CONCURRENT_SAVES)
+            async with self._save_semaphore:
+                await run_in_threadpool(self._copy_to_disk, upload_file.file, file_path, upload_file.size)
                 
-            logger.info(f"Saved temporary file: {file_path}")
+            logger.info("Saved temporary file: %s", file_path)
             return file_path
             
         except Exception as e:
-            logger.error(f"Error saving uploaded file: {str(e)}")
+            logger.error("Error saving uploaded file: %s", e)
             return None
     
+    @staticmethod
+    def _copy_to_disk(source, file_path: str, size: Optional[int] = None) -> None:
+        """
+        將上傳文件的內容寫入磁碟，小文件一次寫入，大文件分塊寫入
+        
+        Args:
+            source: 上傳文件的底層文件對象
+            file_path: 目標文件路徑
+            size: 上傳文件大小，未知時為 None
+        """
+        source.seek(0)
+        if size is not None and size < SMALL_FILE_THRESHOLD:
+            # 小文件跳過緩衝 IO，直接以文件描述符寫入
+            data = memoryview(source.read())
+            fd = os.open(file_path, _TEMP_FILE_FLAGS, 0o600)
+            try:
+                while data:
+                    data = data[os.write(fd, data):]
+            finally:
+                os.close(fd)
+            return
+        
+        with open(file_path, "wb") as buffer:
+            shutil.copyfileobj(source, buffer, UPLOAD_CHUNK_SIZE)
+    
     async def save_multiple_files(self, upload_files: List[UploadFile]) -> List[str]:
         """
         保存多個上傳的文件
@@ -75,12 +118,19 @@ class FileService:
         if not upload_files:
             return []
             
+        # 並行保存所有文件，總耗時取決於最慢的文件而非所有文件之和
+        results = await asyncio.gather(*[
+            self.save_upload_file(file)
+            for file in upload_files
+            if file and file.filename
+        ], return_exceptions=True)
+        
         saved_paths = []
-        for file in upload_files:
-            if file and file.filename:
-                path = await self.save_upload_file(file)
-                if path:
-                    saved_paths.append(path)
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error("Error saving uploaded file: %s", result)
+            elif result:
+                saved_paths.append(result)
                     
         return saved_paths
     
@@ -92,20 +142,25 @@ class FileService:
             file_paths: 要清理的文件路徑列表
         """
         for path in file_paths:
-            if path and os.path.exists(path):
-                try:
-                    os.remove(path)
-                    logger.info(f"Deleted temporary file: {path}")
-                except Exception as e:
-                    logger.warning(f"Failed to delete temporary file: {path}, error: {str(e)}")
+            if not path:
+                continue
+            # 直接刪除，文件不存在時忽略，省去一次 exists 的 stat 調用
+            try:
+                os.unlink(path)
+                logger.info("Deleted temporary file: %s", path)
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.warning("Failed to delete temporary file: %s, error: %s", path, e)
     
     def clean_up_temp_directory(self) -> None:
         """清理整個臨時目錄"""
         try:
-            for filename in os.listdir(self.temp_dir):
-                file_path = os.path.join(self.temp_dir, filename)
-                if os.path.isfile(file_path) and filename.startswith("temp_"):
-                    os.remove(file_path)
-                    logger.info(f"Cleaned up old temporary file: {file_path}")
+            # scandir 的目錄項自帶文件類型，判斷是否為文件時不需要額外的 stat 調用
+            with os.scandir(self.temp_dir) as entries:
+                for entry in entries:
+                    if entry.name.startswith("temp_") and entry.is_file(follow_symlinks=False):
+                        os.unlink(entry.path)
+                        logger.info("Cleaned up old temporary file: %s", entry.path)
         except Exception as e:
-            logger.error(f"Error cleaning up temp directory: {str(e)}") 
\ No newline at end of file
+            logger.error("Error cleaning up temp directory: %s", e) 
\ No newline at end of file
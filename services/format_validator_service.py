@@ -1,37 +1,118 @@
 import os
 import re
+import hashlib
 import logging
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, ClassVar, Tuple
 import google.generativeai as genai
 
+from services.gemini_service import generate_text
+from utils.common.ttl_cache import TTLCache
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Precompiled patterns for the local Notion compatibility fixes
+CODE_FENCE_LINE_RE = re.compile(r'^[ \t\r]*```[ \t\r]*(?:\n|\Z)', re.MULTILINE)
+TABLE_LINE_RE = re.compile(r'^[ \t]*\|.*\|[ \t\r]*$', re.MULTILINE)
+TABLE_ROW_RE = re.compile(r'^\s*\|(.*)\|\s*$')
+TABLE_SEPARATOR_RE = re.compile(r'^\s*\|[\s:|-]*-[\s:|-]*\|\s*$')
+HTML_BREAK_RE = re.compile(r'<br\s*/?>', re.IGNORECASE)
+HTML_BOLD_RE = re.compile(r'</?(?:b|strong)\s*>', re.IGNORECASE)
+HTML_ITALIC_RE = re.compile(r'</?(?:i|em)\s*>', re.IGNORECASE)
+HTML_TAG_RE = re.compile(r'</?[a-zA-Z][^>]*>')
+# Markdown autolinks such as <https://example.com>; they look like tags but must keep their URL
+AUTOLINK_RE = re.compile(r'<([a-zA-Z][a-zA-Z0-9+.-]{1,31}:[^\s<>]*)>')
+DEEP_LIST_INDENT_RE = re.compile(r'^[ \t]{4,}(?=(?:[-*+•]|\d+\.)\s)', re.MULTILINE)
+BULLET_MARKER_RE = re.compile(r'^([ \t]*)[•*+](?=[ \t])', re.MULTILINE)
+# Image syntax that is not immediately followed by a complete (url); only Gemini can repair it
+MALFORMED_IMAGE_PATTERN = r'!\[[^\]\n]*\](?!\([^)\n]+\))'
+# Single scan for any construct the fixes above (or Gemini) would touch
+NEEDS_FIX_RE = re.compile(
+    r'```|<[a-zA-Z/!][^>]*>|^\s*\|.*\|\s*$|^[ \t]{4,}(?:[-*+•]|\d+\.)\s|^[ \t]*[•*+][ \t]|' + MALFORMED_IMAGE_PATTERN,
+    re.MULTILINE,
+)
+
+# Static parts of the Gemini validation prompt; the content is sent as a separate part between them
+VALIDATION_PROMPT_HEAD = """
+You are a Markdown format expert. Your task is to check if the following Markdown content is compatible with Notion and fix any compatibility issues.
+
+Here are the Markdown formats supported by Notion:
+1. Headings: # Level 1 Heading, ## Level 2 Heading
+2. Text formatting: **bold**, *italic*, ***bold and italic***
+3. Quotes: > quoted text
+4. Bullet lists: - item or • item
+5. Dividers: ---
+6. Images: ![alt text](image_url) - ensure images have proper syntax
+
+Here are formats NOT supported or with limited support in Notion:
+1. Tables are not supported
+2. Complex nested lists are not supported
+3. HTML tags are not supported
+4. Code blocks with triple backticks (```) are not supported well
+
+IMPORTANT: DO NOT modify or remove any emojis in the content. All emojis should be preserved exactly as they appear in the original text.
+
+IMPORTANT: DO NOT wrap the entire content in code blocks (```). If you see the entire content wrapped in code blocks, remove the code block markers.
+
+IMPORTANT: For images, ensure they have proper Markdown syntax and are on their own line for better rendering.
+
+Please check the following content and fix any compatibility issues. Maintain the original meaning and structure, only modify formatting issues:
+
+```
+"""
+
+VALIDATION_PROMPT_TAIL = """
+```
+
+Return the fixed content directly without any explanations or comments. If the content is already compatible with Notion, return the original content.
+"""
+
 class FormatValidatorService:
-    def __init__(self, api_key: str):
+    # Model handles shared across instances, keyed by API key, so genai.configure
+    # runs once per key instead of once per service instance
+    _model_cache: ClassVar[Dict[str, Any]] = {}
+    
+    def __init__(self, api_key: str, use_gemini: bool = False, cache_ttl: float = 0):
         """
         Initialize the Format Validator service with Gemini API key.
         
         Args:
             api_key: Gemini API key
+            use_gemini: Whether to run the Gemini-based check after the local fixes
+            cache_ttl: Seconds to reuse a Gemini validation result for identical content (0 disables caching)
         """
         logger.info("Initializing FormatValidatorService")
         if not api_key:
             logger.error("API key is empty or None")
             raise ValueError("Gemini API key is required")
         
-        # Configure the Gemini API
-        genai.configure(api_key=api_key)
-        
-        # Get the Gemini model
-        self.model = genai.GenerativeModel('gemini-2.0-flash-lite')
+        self.use_gemini = use_gemini
+        self.validation_cache = TTLCache(maxsize=256, ttl=cache_ttl) if use_gemini and cache_ttl > 0 else None
+        self.model = None
+        if use_gemini:
+            self.model = self._model_cache.get(api_key)
+            if self.model is None:
+                # Configure the Gemini API
+                genai.configure(api_key=api_key)
+                
+                # Get the Gemini model
+                self.model = genai.GenerativeModel('gemini-2.0-flash-lite')
+                self._model_cache[api_key] = self.model
+            else:
+                logger.info("Reusing cached Gemini validation model")
         logger.info("FormatValidatorService initialized successfully")
     
     def validate_markdown_format(self, content: str) -> Tuple[bool, str]:
         """
         Validate if the markdown content is compatible with Notion and fix any issues.
         
+        Content without any unsupported construct is returned unchanged. Otherwise
+        known incompatibilities are fixed locally with precompiled regexes. The
+        generator prompt already asks for Notion-compatible output, so the Gemini-based
+        check is only a fallback: it runs when the service was created with use_gemini
+        and the locally fixed content still contains unsupported constructs.
+        
         Args:
             content: Markdown content to validate
             
@@ -39,73 +120,101 @@ class FormatValidatorService:
             Tuple of (is_valid, fixed_content)
         """
         logger.info("Validating Notion format compatibility")
-        logger.info(f"Input content length: {len(content)} characters")
+        logger.info("Input content length: %s characters", len(content))
+        
+        if not NEEDS_FIX_RE.search(content):
+            logger.info("No unsupported constructs found, skipping validation")
+            return True, content
+        
+        content = self._fix_format_locally(content)
+        if not self.use_gemini or not NEEDS_FIX_RE.search(content):
+            return True, content
+        
+        cache_key = None
+        if self.validation_cache is not None:
+            cache_key = hashlib.blake2b(content.encode(), digest_size=16).hexdigest()
+            cached = self.validation_cache.get(cache_key)
+            if cached is not None:
+                logger.info("Returning cached validation result for identical content")
+                return cached
+        
+        result = self._validate_with_gemini(content)
+        # Only successful validations are cached so a transient API error is retried next time
+        if cache_key is not None and result[0]:
+            self.validation_cache.set(cache_key, result)
+        return result
+    
+    def _fix_format_locally(self, content: str) -> str:
+        """
+        Deterministically fix the formats Notion doesn't support.
         
+        Args:
+            content: Markdown content to fix
+            
+        Returns:
+            The fixed content
+        """
         # 檢查並修復整個內容被代碼塊包圍的問題
         if content.startswith('```') and content.endswith('```'):
             logger.info("Content is wrapped in code block, removing code block markers")
             content = content[3:-3].strip()
         
-        # 檢查是否有多餘的代碼塊標記
-        lines = content.split('\n')
-        code_block_starts = [i for i, line in enumerate(lines) if line.strip() == '```']
-        if len(code_block_starts) % 2 != 0:
-            logger.info("Unbalanced code block markers found, fixing...")
-            # 如果有奇數個代碼塊標記，移除最後一個
-            if code_block_starts:
-                lines.pop(code_block_starts[-1])
-                content = '\n'.join(lines)
-        
-        # 檢查並修復 Markdown 圖片語法
-        img_pattern = r'!\[(.*?)\]\((.*?)\)'
-        if re.search(img_pattern, content):
-            logger.info("Found Markdown image syntax, ensuring proper formatting")
-            # 確保圖片鏈接有正確的格式
-            content = re.sub(img_pattern, r'![\1](\2)', content)
-        
-        # Create prompt for Gemini
-        prompt = f"""
-        You are a Markdown format expert. Your task is to check if the following Markdown content is compatible with Notion and fix any compatibility issues.
-        
-        Here are the Markdown formats supported by Notion:
-        1. Headings: # Level 1 Heading, ## Level 2 Heading
-        2. Text formatting: **bold**, *italic*, ***bold and italic***
-        3. Quotes: > quoted text
-        4. Bullet lists: - item or • item
-        5. Dividers: ---
-        6. Images: ![alt text](image_url) - ensure images have proper syntax
-        
-        Here are formats NOT supported or with limited support in Notion:
-        1. Tables are not supported
-        2. Complex nested lists are not supported
-        3. HTML tags are not supported
-        4. Code blocks with triple backticks (```) are not supported well
-        
-        IMPORTANT: DO NOT modify or remove any emojis in the content. All emojis should be preserved exactly as they appear in the original text.
-        
-        IMPORTANT: DO NOT wrap the entire content in code blocks (```). If you see the entire content wrapped in code blocks, remove the code block markers.
-        
-        IMPORTANT: For images, ensure they have proper Markdown syntax and are on their own line for better rendering.
-        
-        Please check the following content and fix any compatibility issues. Maintain the original meaning and structure, only modify formatting issues:
-        
-        ```
-        {content}
-        ```
-        
-        Return the fixed content directly without any explanations or comments. If the content is already compatible with Notion, return the original content.
+        # 檢查是否有多餘的代碼塊標記（直接定位標記行，不拆分整個內容）
+        if '```' in content:
+            fences = list(CODE_FENCE_LINE_RE.finditer(content))
+            if len(fences) % 2 != 0:
+                logger.info("Unbalanced code block markers found, fixing...")
+                # 如果有奇數個代碼塊標記，移除最後一個
+                start, end = fences[-1].span()
+                if not fences[-1].group().endswith('\n') and start > 0:
+                    start -= 1  # 最後一行沒有換行符，改為移除前一行的換行符
+                content = content[:start] + content[end:]
+        
+        # Tables are not supported: turn each row into a bullet, drop separator rows
+        if TABLE_LINE_RE.search(content):
+            fixed_lines = []
+            for line in content.split('\n'):
+                row = TABLE_ROW_RE.match(line)
+                if row is None:
+                    fixed_lines.append(line)
+                elif not TABLE_SEPARATOR_RE.match(line):
+                    cells = [cell.strip() for cell in row.group(1).split('|')]
+                    fixed_lines.append("- " + " / ".join(cell for cell in cells if cell))
+            content = '\n'.join(fixed_lines)
+        
+        # HTML tags are not supported: unwrap autolinks to bare URLs, map line breaks and
+        # bold/italic to Markdown, keep the inner text of any other tag
+        content = AUTOLINK_RE.sub(r'\1', content)
+        content = HTML_BREAK_RE.sub('\n', content)
+        content = HTML_BOLD_RE.sub('**', content)
+        content = HTML_ITALIC_RE.sub('*', content)
+        content = HTML_TAG_RE.sub('', content)
+        
+        # Complex nested lists are not supported: flatten to at most one nesting level
+        content = DEEP_LIST_INDENT_RE.sub('  ', content)
+        
+        # Normalize bullet markers to '-', which every renderer treats as a list item
+        content = BULLET_MARKER_RE.sub(r'\1-', content)
+        
+        return content
+    
+    def _validate_with_gemini(self, content: str) -> Tuple[bool, str]:
         """
+        Ask Gemini to check the content for any remaining Notion incompatibilities.
         
+        Args:
+            content: Markdown content to validate
+            
+        Returns:
+            Tuple of (is_valid, fixed_content)
+        """
         logger.info("Sending validation prompt to Gemini API")
         
         try:
             # Generate content using Gemini
-            response = self.model.generate_content([{"text": prompt}])
+            fixed_content = generate_text(self.model, (VALIDATION_PROMPT_HEAD, content, VALIDATION_PROMPT_TAIL)).strip()
             logger.info("Received response from Gemini API")
-            
-            # Process response
-            fixed_content = response.text.strip()
-            logger.info(f"Response text length: {len(fixed_content)} characters")
+            logger.info("Response text length: %s characters", len(fixed_content))
             
             if not fixed_content:
                 logger.error("Validation result is empty")
@@ -126,7 +235,7 @@ class FormatValidatorService:
             return True, fixed_content
             
         except Exception as e:
-            logger.error(f"Error validating content with Gemini API: {str(e)}")
+            logger.error("Error validating content with Gemini API: %s", e)
             return False, content
 
     def validate_format(self, content: str) -> Tuple[bool, str]:
@@ -1,90 +1,233 @@
 import google.generativeai as genai
+import hashlib
 import logging
-from typing import Dict, Any
+import re
+from typing import Any, ClassVar, Dict, List, Sequence
+from google.api_core.exceptions import ResourceExhausted
+
+from utils.common.micro_batcher import MicroBatcher
+from utils.common.rate_limiter import RateLimiter
+from utils.common.ttl_cache import TTLCache
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Static report prompt parts, built once at import. The notes are sent as a separate
+# part between them, so the fixed text is never re-copied per call
+REPORT_PROMPT_HEAD = """
+你是一位主日學老師助理。你的任務是根據以下來自主日學課堂的筆記，為家長和教會生成一份美觀、溫馨且具有精美版面設計的週報。
+
+來自課堂筆記的內容：
+"""
+
+REPORT_PROMPT_TAIL = """
+
+請基於這些信息生成一份結構化的週報，遵循以下要求：
+1. **最重要：你可以用不同的方式表達原始筆記中的內容，但絕對不能添加任何原始筆記中沒有的信息或細節**
+2. **最重要：報告的結構和內容應完全基於原始筆記中提供的信息，不要強制使用預定義的章節**
+3. **最重要：根據原始筆記的實際內容來組織報告，使用適合的標題和分類，如果用了更適合的標題和分類，就不用按照原文寫**
+4. **重要：必須使用繁體中文**
+5. **重要：內容應該是連貫的文章格式，而不是分散的點**
+6. **重要：每個段落應該有至少3-5句話，形成完整的敘述**
+7. **重要：使用溫馨可愛的語言，適合描述主日學活動**
+8. **重要：注重版面設計和視覺結構，使用表情符號、分隔線和適當的空白來創造美觀的排版**
+9. **重要：要判斷原文當中的一些符號是不是在 notion 能用，不能的話要推論它的意思並用別的符號或文字取代**
+10.**重要：這是課後紀錄，如果來源有課前的預告提醒，要修改表達方式**
+11.**重要：如果紀錄裡有老師的名字，就盡量不要忽略**
+
+版面設計指南：
+1. 使用 # 和 ## 等標記創建層次分明的標題。
+2. 每個部分標題都應包含表情符號，使內容更加生動活潑
+3. 使用 > 引用格式突出重要信息
+4. 使用 • 或 - 創建項目符號列表
+5. 適當使用 **粗體** 和 *斜體* 強調重要內容
+6. 在各部分之間使用 --- 分隔線創造清晰的視覺分隔
+7. 在報告開頭添加一個溫馨可愛的總體介紹
+8. 要提的神的部分都用"神"這個字，不用要"上帝"
+9. 段落下一行是標題的話，要多加一行換行
+
+版面相容性規則（輸出會直接發布到 Notion）：
+1. 不要使用表格，改用項目符號列表
+2. 列表最多只能有一層縮排，不要使用複雜的巢狀列表
+3. 不要使用任何 HTML 標籤（包括 <br>），換行請直接換行
+4. 不要使用 ``` 代碼塊，也不要用代碼塊包住整份內容
+5. 圖片使用 ![說明](圖片網址) 的格式，並單獨成行
+6. 保留所有表情符號，不要修改或刪除
+
+請直接返回完整的週報內容，不要添加任何額外的格式說明或標記。確保最終輸出是一個美觀、結構清晰且充滿愛的主日學週報。
+
+再次強調：你可以改變表達方式和組織結構，但不能添加原始筆記中沒有的信息。所有內容必須來自原始筆記。
+"""
+
+# Shared limits on outbound Gemini calls (per process) to smooth bursts below the API quota:
+# requests per minute, and estimated tokens per minute (prompt characters / 4 + expected output)
+GEMINI_MAX_REQUESTS_PER_MINUTE = 60
+GEMINI_MAX_TOKENS_PER_MINUTE = 1_000_000
+GEMINI_EXPECTED_OUTPUT_TOKENS = 2048
+gemini_rate_limiter = RateLimiter(GEMINI_MAX_REQUESTS_PER_MINUTE, 60.0)
+gemini_token_limiter = RateLimiter(GEMINI_MAX_TOKENS_PER_MINUTE, 60.0)
+
+# Pause applied to all callers after Gemini answers 429, and how often a throttled call is retried
+GEMINI_QUOTA_BACKOFF = 10.0
+GEMINI_QUOTA_RETRIES = 2
+
+def generate_text(model, prompt_parts: Sequence[str]) -> str:
+    """
+    Send a prompt to a Gemini model under the shared request and token limits.
+    
+    A 429 (ResourceExhausted) pauses the shared limiter so concurrent callers
+    queue locally instead of hitting the quota again, then the call is retried.
+    
+    Args:
+        model: The genai.GenerativeModel to call
+        prompt_parts: Prompt text parts, sent in order as separate content parts
+        
+    Returns:
+        The response text (not stripped)
+    """
+    prompt_length = sum(len(part) for part in prompt_parts)
+    gemini_token_limiter.acquire(prompt_length // 4 + GEMINI_EXPECTED_OUTPUT_TOKENS)
+    contents = [{"text": part} for part in prompt_parts]
+    for attempt in range(GEMINI_QUOTA_RETRIES + 1):
+        try:
+            with gemini_rate_limiter:
+                response = model.generate_content(contents)
+                return response.text
+        except ResourceExhausted:
+            if attempt == GEMINI_QUOTA_RETRIES:
+                raise
+            logger.warning("Gemini quota exhausted, pausing calls for %ss", GEMINI_QUOTA_BACKOFF)
+            gemini_rate_limiter.penalize(GEMINI_QUOTA_BACKOFF)
+
+# Delimiters used to pack several notes into one batched prompt and split the reply
+BATCH_MARKER = "=====REPORT {index}====="
+BATCH_MARKER_RE = re.compile(r"^=====REPORT (\d+)=====\s*$", re.MULTILINE)
+
+BATCH_PROMPT_HEADER = """
+以下有 {count} 份彼此獨立的課堂筆記，每份都以 {marker} 形式的標記開頭。
+請對每一份筆記分別套用下面的週報要求，並以相同的標記（保持相同編號、獨立成行）開頭依序輸出每一份週報，不要在標記以外添加任何說明。
+"""
+
 class GeminiService:
-    def __init__(self, api_key: str):
-        """Initialize the Gemini client with the API key."""
+    # Model handles shared across instances, keyed by API key, so genai.configure
+    # runs once per key instead of once per service instance
+    _model_cache: ClassVar[Dict[str, Any]] = {}
+    
+    def __init__(self, api_key: str, max_batch_size: int = 1, max_batch_wait: float = 0.03, cache_ttl: float = 0):
+        """
+        Initialize the Gemini client with the API key.
+        
+        Args:
+            api_key: Gemini API key
+            max_batch_size: Maximum number of concurrent requests packed into one API call (1 disables batching)
+            max_batch_wait: Maximum time in seconds to wait for a batch to fill
+            cache_ttl: Seconds to reuse a generated report for identical content (0 disables caching)
+        """
         logger.info("Initializing GeminiService")
+        self.batcher = MicroBatcher(self.generate_report_batch, max_batch_size, max_batch_wait) if max_batch_size > 1 else None
+        self.report_cache = TTLCache(maxsize=256, ttl=cache_ttl) if cache_ttl > 0 else None
         if not api_key:
             logger.error("Gemini API key is empty or None")
             raise ValueError("Gemini API key is required")
             
         # Log a masked version of the API key for debugging
         masked_key = api_key[:4] + "..." + api_key[-4:] if len(api_key) > 8 else "***"
-        logger.info(f"Using Gemini API key: {masked_key}")
+        logger.info("Using Gemini API key: %s", masked_key)
+        
+        self.model = self._model_cache.get(api_key)
+        if self.model is not None:
+            logger.info("Reusing cached Gemini model")
+            return
         
         try:
             genai.configure(api_key=api_key)
             self.model = genai.GenerativeModel('gemini-2.0-pro-exp-02-05')
+            self._model_cache[api_key] = self.model
             logger.info("Gemini model initialized successfully")
         except Exception as e:
-            logger.error(f"Failed to initialize Gemini model: {str(e)}")
+            logger.error("Failed to initialize Gemini model: %s", e)
             raise
     
     def generate_report(self, content: str) -> str:
         """
         Generate a Sunday School weekly report using the Gemini API based on provided content.
         
+        When batching is enabled, concurrent calls are collected for a short window
+        and sent to Gemini together in one request. When caching is enabled, a report
+        generated for identical content within the TTL is returned without calling Gemini.
+        
         Args:
             content: User input about class activities
             
         Returns:
             Generated report text with paragraphs separated by double newlines
         """
-        logger.info("Generating report from content")
-        logger.info(f"Input content length: {len(content)} characters")
+        cache_key = None
+        if self.report_cache is not None:
+            cache_key = hashlib.blake2b(content.encode(), digest_size=16).hexdigest()
+            cached = self.report_cache.get(cache_key)
+            if cached is not None:
+                logger.info("Returning cached report for identical content")
+                return cached
+        
+        if self.batcher is not None:
+            report_text = self.batcher.submit(content)
+        else:
+            report_text = self._generate(REPORT_PROMPT_HEAD, content, REPORT_PROMPT_TAIL)
+        
+        if cache_key is not None:
+            self.report_cache.set(cache_key, report_text)
+        return report_text
+    
+    def generate_report_batch(self, contents: List[str]) -> List[str]:
+        """
+        Generate several reports with a single Gemini API call.
         
-        # Create prompt for Gemini
-        prompt = f"""
-        你是一位主日學老師助理。你的任務是根據以下來自主日學課堂的筆記，為家長和教會生成一份美觀、溫馨且具有精美版面設計的週報。
-
-        來自課堂筆記的內容：
-        {content}
-
-        請基於這些信息生成一份結構化的週報，遵循以下要求：
-        1. **最重要：你可以用不同的方式表達原始筆記中的內容，但絕對不能添加任何原始筆記中沒有的信息或細節**
-        2. **最重要：報告的結構和內容應完全基於原始筆記中提供的信息，不要強制使用預定義的章節**
-        3. **最重要：根據原始筆記的實際內容來組織報告，使用適合的標題和分類，如果用了更適合的標題和分類，就不用按照原文寫**
-        4. **重要：必須使用繁體中文**
-        5. **重要：內容應該是連貫的文章格式，而不是分散的點**
-        6. **重要：每個段落應該有至少3-5句話，形成完整的敘述**
-        7. **重要：使用溫馨可愛的語言，適合描述主日學活動**
-        8. **重要：注重版面設計和視覺結構，使用表情符號、分隔線和適當的空白來創造美觀的排版**
-        9. **重要：要判斷原文當中的一些符號是不是在 notion 能用，不能的話要推論它的意思並用別的符號或文字取代**
-        10.**重要：這是課後紀錄，如果來源有課前的預告提醒，要修改表達方式**
-        11.**重要：如果紀錄裡有老師的名字，就盡量不要忽略**
-
-        版面設計指南：
-        1. 使用 # 和 ## 等標記創建層次分明的標題。
-        2. 每個部分標題都應包含表情符號，使內容更加生動活潑
-        3. 使用 > 引用格式突出重要信息
-        4. 使用 • 或 - 創建項目符號列表
-        5. 適當使用 **粗體** 和 *斜體* 強調重要內容
-        6. 在各部分之間使用 --- 分隔線創造清晰的視覺分隔
-        7. 在報告開頭添加一個溫馨可愛的總體介紹
-        8. 要提的神的部分都用"神"這個字，不用要"上帝"
-        9. 段落下一行是標題的話，要多加一行換行
-
-        請直接返回完整的週報內容，不要添加任何額外的格式說明或標記。確保最終輸出是一個美觀、結構清晰且充滿愛的主日學週報。
+        Falls back to one call per content if the batched reply cannot be split
+        back into the expected number of reports.
         
-        再次強調：你可以改變表達方式和組織結構，但不能添加原始筆記中沒有的信息。所有內容必須來自原始筆記。
+        Args:
+            contents: List of user inputs about class activities
+            
+        Returns:
+            List of generated report texts, in the same order as contents
         """
+        if len(contents) == 1:
+            return [self._generate(REPORT_PROMPT_HEAD, contents[0], REPORT_PROMPT_TAIL)]
         
-        logger.info("Sending prompt to Gemini API")
+        packed = "\n\n".join(
+            f"{BATCH_MARKER.format(index=i)}\n{content}" for i, content in enumerate(contents, 1)
+        )
+        header = BATCH_PROMPT_HEADER.format(count=len(contents), marker=BATCH_MARKER.format(index="N"))
+        
+        reports = self._split_batch_response(
+            self._generate(header, REPORT_PROMPT_HEAD, packed, REPORT_PROMPT_TAIL), len(contents)
+        )
+        if reports is None:
+            logger.warning("Could not split batched Gemini response, falling back to individual requests")
+            return [self._generate(REPORT_PROMPT_HEAD, content, REPORT_PROMPT_TAIL) for content in contents]
+        return reports
+    
+    def _split_batch_response(self, text: str, count: int):
+        """Split a batched reply on its markers; returns None if the reports don't line up"""
+        parts = BATCH_MARKER_RE.split(text)
+        # parts = [preamble, index1, report1, index2, report2, ...]
+        indices = [int(index) for index in parts[1::2]]
+        reports = [report.strip() for report in parts[2::2]]
+        if indices != list(range(1, count + 1)) or not all(reports):
+            return None
+        return reports
+    
+    def _generate(self, *prompt_parts: str) -> str:
+        """Send the prompt parts to Gemini and return the stripped response text"""
+        logger.info("Sending prompt to Gemini API (%s characters)", sum(len(part) for part in prompt_parts))
         
         try:
             # Generate content using Gemini
-            response = self.model.generate_content([{"text": prompt}])
+            report_text = generate_text(self.model, prompt_parts).strip()
             logger.info("Received response from Gemini API")
-            
-            # Process response
-            report_text = response.text.strip()
-            logger.info(f"Response text length: {len(report_text)} characters")
+            logger.info("Response text length: %s characters", len(report_text))
             
             if not report_text:
                 logger.error("Generated report is empty")
@@ -93,5 +236,5 @@ class GeminiService:
             return report_text
             
         except Exception as e:
-            logger.error(f"Error generating content with Gemini API: {str(e)}")
+            logger.error("Error generating content with Gemini API: %s", e)
             raise
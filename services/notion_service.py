@@ -3,6 +3,8 @@ import json
 import logging
 from typing import Dict, List, Any, Optional
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from config import settings
 from services.storage_service import StorageService
 from utils.notion.api_wrapper import NotionApiClient
 from utils.notion.block_builder import NotionBlockBuilder
@@ -14,14 +16,29 @@ from utils.common.logging_utils import get_logger
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = get_logger(__name__)
 
+# Shared pool for overlapping independent Notion requests made by the same call
+_notion_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="notion")
+
 class NotionService:
-    def __init__(self, api_key: str):
-        """Initialize the Notion client with the API key."""
+    def __init__(self, api_key: str, database_id: Optional[str] = None):
+        """
+        Initialize the Notion client with the API key.
+        
+        Args:
+            api_key: Notion API key
+            database_id: ID of the database new report pages are created in
+                         (defaults to NOTION_DATABASE_ID from the application settings)
+        """
         logger.info("Initializing NotionService")
         if not api_key:
             logger.error("API key is empty or None")
             raise ValueError("Notion API key is required")
         
+        # Resolve the database ID once instead of on every page creation
+        self.database_id = database_id or settings.notion_database_id
+        if not self.database_id:
+            logger.warning("NOTION_DATABASE_ID is not set; report pages cannot be created")
+        
         # Initialize API client
         self.api_client = NotionApiClient(api_key)
         
@@ -40,7 +57,7 @@ class NotionService:
             self.image_handler = ImageHandler(self.storage_service)
             logger.info("Image handler initialized successfully")
         except Exception as e:
-            logger.error(f"Failed to initialize Storage service: {str(e)}")
+            logger.error("Failed to initialize Storage service: %s", e)
             self.storage_service = None
             
             # Initialize image handler without storage service
@@ -59,20 +76,20 @@ class NotionService:
         Returns:
             A dictionary containing the extracted text and image URLs
         """
-        logger.info(f"Getting content from page: {page_id}")
+        logger.info("Getting content from page: %s", page_id)
         
         try:
-            # Get the page
-            page_data = self.api_client.get_page(page_id)
-            
-            # Get the blocks
+            # The page and its blocks are independent requests, so fetch the page
+            # in the background while the blocks are fetched on this thread
+            page_future = _notion_executor.submit(self.api_client.get_page, page_id)
             blocks = self.api_client.get_page_blocks(page_id)
+            page_data = page_future.result()
             
             # Extract content using block builder
             return self.block_builder.extract_content(page_data, blocks)
             
         except Exception as e:
-            logger.error(f"Error getting page content: {str(e)}")
+            logger.error("Error getting page content: %s", e)
             raise
 
     def create_page(self, title: str, content: list, image_paths: list = None, report_date: str = None):
@@ -88,10 +105,10 @@ class NotionService:
         Returns:
             (page_url, page_id)
         """
-        logger.info(f"Creating Notion page with title: {title}")
-        logger.info(f"Content length: {len(content)} paragraphs")
-        logger.info(f"Number of images: {len(image_paths) if image_paths else 0}")
-        logger.info(f"Report date: {report_date}")
+        logger.info("Creating Notion page with title: %s", title)
+        logger.info("Content length: %s paragraphs", len(content))
+        logger.info("Number of images: %s", len(image_paths) if image_paths else 0)
+        logger.info("Report date: %s", report_date)
         
         # Format the report date using block builder
         formatted_date = self.block_builder.format_date(report_date)
@@ -108,10 +125,10 @@ class NotionService:
         try:
             page_id = self.create_report_page(report_content)
             page_url = f"https://notion.so/{page_id.replace('-', '')}"
-            logger.info(f"Created Notion page: {page_url}")
+            logger.info("Created Notion page: %s", page_url)
             return page_url, page_id
         except Exception as e:
-            logger.error(f"Failed to create Notion page: {str(e)}")
+            logger.error("Failed to create Notion page: %s", e)
             raise
     
     def create_report_page(self, report_content: Dict[str, Any]):
@@ -126,8 +143,7 @@ class NotionService:
         """
         logger.info("Creating report page in Notion")
         
-        # Get the database ID from environment variable
-        database_id = os.environ.get("NOTION_DATABASE_ID")
+        database_id = self.database_id
         if not database_id:
             logger.error("NOTION_DATABASE_ID environment variable is not set")
             raise ValueError("NOTION_DATABASE_ID environment variable is required")
@@ -181,7 +197,7 @@ class NotionService:
         Note:
             圖片會上傳到 GCS，本地臨時文件會在上傳後刪除
         """
-        logger.info(f"Uploading image to GCS: {image_path}")
+        logger.info("Uploading image to GCS: %s", image_path)
         
         # Use image handler to upload the image
         return self.image_handler.upload_image(image_path)
@@ -2,9 +2,11 @@
 Google Cloud Storage 靜態頁面平台實現
 """
 from typing import List, Dict, Any, Optional
+import threading
 import markdown
-from jinja2 import Environment, FileSystemLoader
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache
 from services.interfaces import OutputPlatformInterface
+from config import settings
 from utils.common.logging_utils import get_logger
 from datetime import datetime
 import re
@@ -14,17 +16,31 @@ logger = get_logger("gcs_platform")
 class GCSPlatform(OutputPlatformInterface):
     def __init__(self, storage_service):
         self.storage_service = storage_service
-        # 初始化 markdown 轉換器，啟用擴展功能
-        self.markdown = markdown.Markdown(
-            extensions=['extra', 'nl2br', 'sane_lists', 'smarty', 'tables']
-        )
+        # markdown 轉換器在線程池中並行使用，每個線程保留一個實例重複使用
+        self._local = threading.local()
         # 初始化 Jinja2 環境
         self.jinja_env = Environment(
             loader=FileSystemLoader('templates'),
-            autoescape=True
+            autoescape=True,
+            auto_reload=settings.template_auto_reload,
+            # 編譯結果緩存到臨時目錄，worker 重啟後無需重新解析
+            bytecode_cache=FileSystemBytecodeCache()
         )
         # 添加 nl2br 過濾器
         self.jinja_env.filters['nl2br'] = lambda value: value.replace('\n', '<br>') if value else ''
+        # 預先編譯報告模板，避免首次發布時才解析
+        self.report_template = self.jinja_env.get_template('reports/report_template.html')
+    
+    @property
+    def markdown(self) -> markdown.Markdown:
+        """當前線程的 markdown 轉換器，啟用擴展功能，只在首次使用時初始化擴展"""
+        md = getattr(self._local, 'markdown', None)
+        if md is None:
+            md = markdown.Markdown(
+                extensions=['extra', 'nl2br', 'sane_lists', 'smarty', 'tables']
+            )
+            self._local.markdown = md
+        return md
     
     def _convert_markdown_to_html(self, content: List[str]) -> str:
         """將 Markdown 內容轉換為 HTML"""
@@ -41,7 +57,8 @@ class GCSPlatform(OutputPlatformInterface):
             youtube_pattern2 = r'(?<!\]\()(?<!\])\b(https?://(?:www\.)?(?:youtube\.com/watch\?v=|youtu\.be/|youtube\.com/shorts/))([a-zA-Z0-9_-]+)(?:[^\s]*?)\b'
             markdown_text = re.sub(youtube_pattern2, r'<div class="video-container"><iframe width="560" height="315" src="https://www.youtube.com/embed/\2" frameborder="0" allow="accelerometer; autoplay; clipboard-write; encrypted-media; gyroscope; picture-in-picture" allowfullscreen></iframe></div>', markdown_text)
             
-            html_content = self.markdown.convert(markdown_text)
+            # 重置轉換器狀態，避免上一份報告的內容（如腳註、縮寫）殘留
+            html_content = self.markdown.reset().convert(markdown_text)
             
             # 處理圖片標籤，確保圖片有響應式樣式
             html_content = html_content.replace('<img ', '<img style="max-width:100%; height:auto; display:block; margin:0 auto;" ')
@@ -72,7 +89,7 @@ class GCSPlatform(OutputPlatformInterface):
             
             return html_content
         except Exception as e:
-            logger.error(f"Markdown 轉換失敗: {str(e)}")
+            logger.error("Markdown 轉換失敗: %s", e)
             # 返回簡單的 HTML 格式化，作為備用方案
             return "<p>" + "</p><p>".join([p.replace('\n', '<br>') for p in content]) + "</p>"
     
@@ -88,9 +105,8 @@ class GCSPlatform(OutputPlatformInterface):
         content_html = self._convert_markdown_to_html(content)
         
         # 保存原始 Markdown 內容，用於編輯
+        # 模板已開啟 autoescape，寫入屬性時會由 markupsafe 完整轉義 & < > " '，無需再手動處理
         original_markdown = "\n\n".join(content)
-        # 處理引號，避免 HTML 屬性問題
-        original_markdown = original_markdown.replace('"', '&quot;')
         
         # 生成圖片 HTML
         images_html = ""
@@ -101,7 +117,10 @@ class GCSPlatform(OutputPlatformInterface):
             ])
         
         # 渲染模板
-        template = self.jinja_env.get_template('reports/report_template.html')
+        template = (
+            self.jinja_env.get_template('reports/report_template.html')
+            if settings.template_auto_reload else self.report_template
+        )
         return template.render(
             title=title,
             content_html=content_html,
@@ -172,7 +191,7 @@ class GCSPlatform(OutputPlatformInterface):
             }
             
         except Exception as e:
-            logger.error(f"Failed to publish to GCS: {str(e)}")
+            logger.error("Failed to publish to GCS: %s", e)
             return {
                 "success": False,
                 "url": "",
@@ -7,6 +7,9 @@ from utils.common.logging_utils import get_logger
 
 logger = get_logger("notion_platform")
 
+# Notion API 無法設置頁面共享權限，需提示使用者手動設置
+NOTION_PERMISSION_NOTE = "請手動設置頁面權限為「工作區所有人可見」"
+
 class NotionPlatform(OutputPlatformInterface):
     def __init__(self, notion_service):
         self.notion_service = notion_service
@@ -45,12 +48,12 @@ class NotionPlatform(OutputPlatformInterface):
                 "url": page_url,
                 "platform_specific_data": {
                     "page_id": page_id,
-                    "workspace_access": "請手動設置頁面權限為「工作區所有人可見」"
+                    "workspace_access": NOTION_PERMISSION_NOTE
                 }
             }
             
         except Exception as e:
-            logger.error(f"Failed to publish to Notion: {str(e)}")
+            logger.error("Failed to publish to Notion: %s", e)
             return {
                 "success": False,
                 "url": "",
@@ -4,11 +4,15 @@
 import logging
 from typing import List, Tuple, Dict, Any, Optional
 from datetime import datetime
+from concurrent.futures import Future, ThreadPoolExecutor
 from config import settings
 import os
 import re
 
+from lxml import html as lxml_html
+
 from utils.common.logging_utils import get_logger
+from utils.common.ttl_cache import TTLCache
 from services.gemini_service import GeminiService
 from services.format_validator_service import FormatValidatorService
 from .interfaces import OutputPlatformInterface
@@ -16,6 +20,15 @@ from .interfaces import OutputPlatformInterface
 # 配置日誌
 logger = get_logger("report_service")
 
+# 圖片上傳與 Gemini 生成並行執行時使用的線程池
+_upload_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="image-upload")
+
+# 使用者未提供標題時的默認報告標題
+DEFAULT_REPORT_TITLE = "主日學週報"
+
+# 段落分隔：兩個以上連續換行，一次分割並合併多餘的空行
+_PARA_RE = re.compile(r'\n{2,}')
+
 class ReportService:
     """處理報告生成的核心業務邏輯"""
     
@@ -31,6 +44,8 @@ class ReportService:
         self.gemini_service = gemini_service
         self.output_platform = output_platform
         self.format_validator_service = format_validator_service
+        # 首頁每次載入都會列出報告，短時間內重用結果；報告新增、修改或刪除時清空
+        self._report_list_cache = TTLCache(maxsize=1, ttl=settings.report_list_cache_ttl) if settings.report_list_cache_ttl > 0 else None
     
     def format_date_for_display(self, date_str: str) -> str:
         """
@@ -51,7 +66,7 @@ class ReportService:
             # 處理無效日期
             return "未知日期"
     
-    def generate_report_title(self, report_date: str, user_title: str = "主日學週報") -> str:
+    def generate_report_title(self, report_date: str, user_title: str = DEFAULT_REPORT_TITLE) -> str:
         """
         根據報告日期和使用者提供的標題生成標準化的報告標題
         
@@ -91,47 +106,146 @@ class ReportService:
             logger.info("Format validation successful")
         
         # 按段落分割
-        report_content = report_text.split('\n\n')
+        report_content = _PARA_RE.split(report_text)
         
         return report_content, is_valid
     
-    def generate_full_report(self, content: str, report_date: str, image_paths: List[str] = None, title: str = "主日學週報") -> Dict[str, Any]:
+    def _get_storage_service(self):
+        """獲取輸出平台的存儲服務，不可用時返回 None"""
+        return getattr(self.output_platform, 'storage_service', None)
+    
+    def can_stream_images(self) -> bool:
+        """
+        檢查是否可以將上傳的圖片直接串流到雲端存儲
+        
+        Returns:
+            bool: 存儲服務是否可用
+        """
+        return self._get_storage_service() is not None
+    
+    def _submit_image_streams(self, storage_service, images: List[Any]) -> List[Tuple[str, Future]]:
+        """
+        將每張上傳的圖片提交到上傳線程池，各圖片並行串流到雲端存儲
+        
+        Args:
+            storage_service: 存儲服務實例
+            images: 上傳的圖片列表，每個項目需有 file、filename 和 content_type 屬性（如 UploadFile）
+            
+        Returns:
+            List[Tuple[str, Future]]: 按原順序排列的文件名與上傳 Future
+        """
+        return [
+            (image.filename, _upload_executor.submit(storage_service.upload_stream, image.file, image.filename, image.content_type))
+            for image in images
+            if image and image.filename
+        ]
+    
+    def _collect_image_uploads(self, uploads: List[Tuple[str, Future]]) -> Tuple[List[str], List[str]]:
+        """
+        等待圖片上傳完成，按提交順序收集結果
+        
+        Args:
+            uploads: _submit_image_streams 返回的文件名與上傳 Future
+            
+        Returns:
+            Tuple[List[str], List[str]]: 成功上傳的圖片 URL 列表和上傳失敗的文件名列表
+        """
+        cloud_image_urls = []
+        failed_images = []
+        for filename, future in uploads:
+            cloud_url = future.result()
+            if cloud_url:
+                cloud_image_urls.append(cloud_url)
+                logger.info("Image uploaded successfully: %s", cloud_url)
+            else:
+                failed_images.append(filename)
+                logger.warning("Failed to upload image: %s", filename)
+        
+        return cloud_image_urls, failed_images
+    
+    def upload_image_streams(self, images: List[Any]) -> Tuple[List[str], List[str]]:
+        """
+        將上傳的圖片直接串流到雲端存儲，不經過本地磁碟，多張圖片並行上傳
+        
+        Args:
+            images: 上傳的圖片列表，每個項目需有 file、filename 和 content_type 屬性（如 UploadFile）
+            
+        Returns:
+            Tuple[List[str], List[str]]: 成功上傳的圖片 URL 列表（保持上傳順序）和上傳失敗的文件名列表
+        """
+        storage_service = self._get_storage_service()
+        if storage_service is None:
+            raise ValueError("Storage service is not available")
+        
+        return self._collect_image_uploads(self._submit_image_streams(storage_service, images))
+    
+    def _upload_local_images(self, storage_service, image_paths: List[str]) -> Tuple[List[str], List[str]]:
+        """
+        將本地圖片上傳到雲端存儲
+        
+        Args:
+            storage_service: 存儲服務實例
+            image_paths: 本地圖片路徑列表
+            
+        Returns:
+            Tuple[List[str], List[str]]: 成功上傳的圖片 URL 列表和上傳失敗的路徑列表
+        """
+        cloud_image_urls = []
+        failed_images = []
+        for image_path in image_paths:
+            if image_path:
+                cloud_url = storage_service.upload_image(image_path)
+                if cloud_url:
+                    cloud_image_urls.append(cloud_url)
+                    logger.info("Image uploaded successfully: %s", cloud_url)
+                else:
+                    failed_images.append(image_path)
+                    logger.warning("Failed to upload image: %s", image_path)
+        
+        return cloud_image_urls, failed_images
+    
+    def generate_full_report(self, content: str, report_date: str, image_paths: List[str] = None, title: str = DEFAULT_REPORT_TITLE, image_urls: List[str] = None, images: List[Any] = None) -> Dict[str, Any]:
         """
         生成完整報告並發布到指定平台
         
         Args:
             content: 原始內容
             report_date: 報告日期
-            image_paths: 圖片路徑列表
+            image_paths: 本地圖片路徑列表，會先上傳到雲端存儲
             title: 使用者提供的報告標題，默認為"主日學週報"
+            image_urls: 已經上傳到雲端的圖片 URL 列表
+            images: 上傳的圖片列表（如 UploadFile），存儲服務可用時直接串流到雲端存儲
             
         Returns:
             Dict[str, Any]: 包含報告結果的字典
         """
-        # 處理圖片路徑
-        image_paths = image_paths or []
-        cloud_image_urls = []
-        failed_images = []
+        # 圖片上傳與報告生成互不依賴，在背景上傳圖片的同時生成報告內容
+        stream_uploads = []
+        upload_future = None
+        storage_service = self._get_storage_service()
+        if storage_service:
+            if images:
+                stream_uploads = self._submit_image_streams(storage_service, images)
+            if image_paths:
+                upload_future = _upload_executor.submit(self._upload_local_images, storage_service, image_paths)
         
-        # 上傳圖片到雲端存儲
-        if image_paths and hasattr(self.output_platform, 'storage_service'):
-            storage_service = self.output_platform.storage_service
-            for image_path in image_paths:
-                if image_path:
-                    cloud_url = storage_service.upload_image(image_path)
-                    if cloud_url:
-                        cloud_image_urls.append(cloud_url)
-                        logger.info(f"Image uploaded successfully: {cloud_url}")
-                    else:
-                        failed_images.append(image_path)
-                        logger.warning(f"Failed to upload image: {image_path}")
+        # 生成報告內容
+        report_content, is_valid = self.generate_report_content(content)
+        
+        # 等待圖片上傳完成
+        cloud_image_urls = list(image_urls or [])
+        failed_images = []
+        if stream_uploads:
+            uploaded_urls, failed_images = self._collect_image_uploads(stream_uploads)
+            cloud_image_urls.extend(uploaded_urls)
+        if upload_future is not None:
+            uploaded_urls, failed_paths = upload_future.result()
+            cloud_image_urls.extend(uploaded_urls)
+            failed_images.extend(failed_paths)
         
         # 如果有圖片上傳失敗，記錄警告
         if failed_images:
-            logger.warning(f"Failed to upload {len(failed_images)} images: {failed_images}")
-        
-        # 生成報告內容
-        report_content, is_valid = self.generate_report_content(content)
+            logger.warning("Failed to upload %s images: %s", len(failed_images), failed_images)
         
         # 生成標題
         report_title = self.generate_report_title(report_date, user_title=title)
@@ -144,6 +258,7 @@ class ReportService:
             image_paths=cloud_image_urls,
             original_content=content  # 傳遞原始內容
         )
+        self._invalidate_report_list()
         
         # 返回結果
         return {
@@ -165,8 +280,6 @@ class ReportService:
         Returns:
             Dict[str, Any]: 包含報告內容的字典
         """
-        from bs4 import BeautifulSoup
-        
         # 檢查服務是否可用
         if not hasattr(self.output_platform, 'storage_service'):
             raise ValueError("Storage service is not available")
@@ -178,27 +291,26 @@ class ReportService:
             raise ValueError("Failed to get report content")
         
         # 從文件名中提取報告日期
-        filename = report_path.split("/")[-1]
-        report_date = filename.replace(".html", "")
+        report_date = os.path.basename(report_path).removesuffix(".html")
         
         # 從 HTML 中提取原始 Markdown 內容
-        # 使用 BeautifulSoup 解析 HTML
-        soup = BeautifulSoup(html_content, 'html.parser')
+        # 直接使用 lxml 解析，元素查找在 libxml2 中完成，不經過 Python 層遍歷
+        tree = lxml_html.fromstring(html_content)
         
         # 查找包含原始 Markdown 的元素
-        markdown_element = soup.find('div', id='original-markdown')
+        markdown_element = tree.get_element_by_id('original-markdown', None)
         
-        if markdown_element and markdown_element.get('data-content'):
+        if markdown_element is not None and markdown_element.get('data-content'):
             # 從 data-content 屬性中獲取 Markdown 內容
-            markdown_content = markdown_element['data-content']
+            markdown_content = markdown_element.get('data-content')
             logger.info("Successfully extracted original Markdown content")
         else:
             # 如果找不到原始 Markdown，則報錯
             raise ValueError("Original Markdown content not found in the report")
         
         # 提取報告標題
-        title_element = soup.find('h1')
-        report_title = title_element.text if title_element else "主日學報告"
+        title_element = tree.find('.//h1')
+        report_title = title_element.text_content() if title_element is not None else "主日學報告"
         # 移除 HTML 標籤，但保留換行符號以便在表單中顯示
         report_title = report_title.replace('<br>', '\n').replace('</br>', '')
         
@@ -221,8 +333,6 @@ class ReportService:
         Returns:
             Dict[str, Any]: 包含更新結果的字典
         """
-        from bs4 import BeautifulSoup
-        
         # 檢查服務是否可用
         if not hasattr(self.output_platform, 'storage_service'):
             raise ValueError("Storage service is not available")
@@ -233,28 +343,28 @@ class ReportService:
         if not original_html:
             raise ValueError("Failed to get original report content")
         
-        # 使用 BeautifulSoup 解析原始 HTML
-        soup = BeautifulSoup(original_html, 'html.parser')
+        # 直接使用 lxml 解析原始 HTML
+        tree = lxml_html.fromstring(original_html)
         
         # 處理標題中的換行符，將其轉換為 <br> 標籤
         title = title.replace('\n', '<br>')
         
         # 從原始 HTML 中獲取之前的 original_content
-        original_content_container = soup.find('div', class_='original-content')
-        original_content = original_content_container.text.strip() if original_content_container else None
+        original_content_container = next(iter(tree.find_class('original-content')), None)
+        original_content = original_content_container.text_content().strip() if original_content_container is not None else None
         
         # 將 Markdown 內容轉換為段落列表
-        content_paragraphs = content.split('\n\n')
+        content_paragraphs = _PARA_RE.split(content)
         
         # 獲取圖片區域
-        image_gallery = soup.find('div', class_='image-gallery')
+        image_gallery = next(iter(tree.find_class('image-gallery')), None)
         image_paths = []
         
-        if image_gallery:
+        if image_gallery is not None:
             # 提取圖片路徑
-            img_tags = image_gallery.find_all('img')
+            img_tags = image_gallery.iter('img')
             image_paths = [img.get('src') for img in img_tags if img.get('src')]
-            logger.info(f"Found {len(image_paths)} images in the report")
+            logger.info("Found %s images in the report", len(image_paths))
         
         # 使用與創建報告時相同的方法生成 HTML 內容
         new_html_content = self.output_platform._generate_html_content(
@@ -265,8 +375,8 @@ class ReportService:
         )
         
         # 使用原始文件名（不包含 .html 擴展名）
-        filename = report_path.split("/")[-1].replace(".html", "")
-        logger.info(f"Updating report with filename: {filename}")
+        filename = os.path.basename(report_path).removesuffix(".html")
+        logger.info("Updating report with filename: %s", filename)
         
         # 上傳更新後的 HTML 內容
         url = self.output_platform.storage_service.upload_html(new_html_content, filename)
@@ -274,6 +384,8 @@ class ReportService:
         if not url:
             raise ValueError("Failed to upload updated HTML content")
         
+        self._invalidate_report_list()
+        
         return {
             "success": True,
             "url": url
@@ -299,13 +411,15 @@ class ReportService:
         if not success:
             raise ValueError("Failed to delete report")
         
+        self._invalidate_report_list()
+        
         return {
             "success": True
         }
     
     def list_reports(self) -> List[Dict[str, Any]]:
         """
-        獲取已生成的報告列表
+        獲取已生成的報告列表（在 REPORT_LIST_CACHE_TTL 秒內重用上次結果）
         
         Returns:
             List[Dict[str, Any]]: 報告列表
@@ -314,7 +428,19 @@ class ReportService:
         if not hasattr(self.output_platform, 'storage_service'):
             raise ValueError("Storage service is not available")
         
+        if self._report_list_cache is not None:
+            reports = self._report_list_cache.get("reports")
+            if reports is not None:
+                return reports
+        
         # 獲取報告列表
         reports = self.output_platform.storage_service.list_reports()
         
-        return reports 
\ No newline at end of file
+        if self._report_list_cache is not None:
+            self._report_list_cache.set("reports", reports)
+        return reports
+    
+    def _invalidate_report_list(self) -> None:
+        """報告有變動時清空報告列表快取"""
+        if self._report_list_cache is not None:
+            self._report_list_cache.clear() 
\ No newline at end of file
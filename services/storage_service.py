@@ -1,7 +1,10 @@
 import os
 import logging
 import uuid
+import google.auth
+from google.auth.transport.requests import AuthorizedSession
 from google.cloud import storage
+from requests.adapters import HTTPAdapter
 from config import settings
 
 # Configure logging
@@ -13,6 +16,9 @@ IMAGES_FOLDER = "images"
 HTML_FOLDER = "reports"
 DEFAULT_FOLDER = ""
 
+# Keep-alive connections kept per host; sized for the request threadpool plus the image upload executor
+HTTP_POOL_MAXSIZE = 32
+
 class StorageService:
     def __init__(self, credentials_json=None):
         """
@@ -33,15 +39,15 @@ class StorageService:
             self._setup_client()
             
             # Log successful initialization
-            logger.info(f"Using GCS bucket: {self.bucket_name}")
+            logger.info("Using GCS bucket: %s", self.bucket_name)
             
         except Exception as e:
-            logger.error(f"Failed to initialize GCS client: {str(e)}")
+            logger.error("Failed to initialize GCS client: %s", e)
             raise
     
     def _validate_bucket_name(self):
-        """Validate that the GCS bucket name is set in environment variables."""
-        self.bucket_name = os.getenv("GCS_BUCKET_NAME")
+        """Validate that the GCS bucket name is set in the application settings."""
+        self.bucket_name = settings.gcs_bucket_name
         if not self.bucket_name:
             logger.warning("GCS_BUCKET_NAME environment variable not set")
             raise ValueError("GCS_BUCKET_NAME environment variable is required")
@@ -51,10 +57,18 @@ class StorageService:
         try:
             # Use Application Default Credentials (ADC)
             # This will automatically use gcloud CLI credentials or metadata server on GCE
-            self.client = storage.Client()
+            credentials, project = google.auth.default(scopes=storage.Client.SCOPE)
+            # Share one pooled, keep-alive HTTP session across threads; the default pool
+            # only keeps 10 connections, so concurrent uploads would reopen TLS connections
+            session = AuthorizedSession(credentials)
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_MAXSIZE, pool_maxsize=HTTP_POOL_MAXSIZE)
+            session.mount("https://", adapter)
+            self.client = storage.Client(project=project, credentials=credentials, _http=session)
+            # Bucket handle is a lightweight reference; build it once and reuse it for every call
+            self.bucket = self.client.bucket(self.bucket_name)
             logger.info("GCS client initialized with Application Default Credentials (ADC)")
         except Exception as e:
-            logger.error(f"Failed to initialize GCS client with ADC: {str(e)}")
+            logger.error("Failed to initialize GCS client with ADC: %s", e)
             raise ValueError(f"Failed to initialize with Application Default Credentials: {str(e)}")
     
     def _get_storage_path(self, base_folder: str, sub_folder: str = None) -> str:
@@ -85,12 +99,12 @@ class StorageService:
         Returns:
             Public URL of the uploaded image
         """
-        logger.info(f"Uploading image to GCS: {image_path}")
+        logger.info("Uploading image to GCS: %s", image_path)
         
         try:
             # Check if file exists
             if not os.path.exists(image_path):
-                logger.error(f"Image file not found: {image_path}")
+                logger.error("Image file not found: %s", image_path)
                 return None
                 
             # Generate a unique blob name to avoid collisions
@@ -100,26 +114,63 @@ class StorageService:
             blob_name = f"{storage_path}/{unique_filename}"
             
             # Get bucket and create blob
-            bucket = self.client.bucket(self.bucket_name)
+            bucket = self.bucket
             blob = bucket.blob(blob_name)
             
             # Upload file
             blob.upload_from_filename(image_path)
-            logger.info(f"Image uploaded to GCS: gs://{self.bucket_name}/{blob_name}")
+            logger.info("Image uploaded to GCS: gs://%s/%s", self.bucket_name, blob_name)
             
             # Generate two URL formats
             # 1. Complete GCS URL (for logging purposes only)
             gcs_url = f"https://storage.googleapis.com/{self.bucket_name}/{blob_name}"
-            logger.info(f"GCS URL: {gcs_url}")
+            logger.info("GCS URL: %s", gcs_url)
             
             # 2. Relative URL path (for display in reports)
             relative_url = f"/{blob_name}"
-            logger.info(f"Relative URL: {relative_url}")
+            logger.info("Relative URL: %s", relative_url)
             
             return relative_url
             
         except Exception as e:
-            logger.error(f"Error uploading image to GCS: {str(e)}")
+            logger.error("Error uploading image to GCS: %s", e)
+            return None
+
+    def upload_stream(self, file_obj, filename: str, content_type: str = None, folder=DEFAULT_FOLDER):
+        """
+        Stream an uploaded file object straight to Google Cloud Storage without
+        writing it to local disk first.
+        
+        Args:
+            file_obj: Readable binary file object (e.g. UploadFile.file)
+            filename: Original filename, used for the blob's extension
+            content_type: MIME type of the file, if known
+            folder: Base folder in the bucket (default: sunday_school_reports)
+            
+        Returns:
+            Relative URL of the uploaded image, or None if the upload failed
+        """
+        logger.info("Streaming image to GCS: %s", filename)
+        
+        try:
+            # Generate a unique blob name to avoid collisions
+            file_extension = os.path.splitext(filename)[1]
+            unique_filename = f"{uuid.uuid4()}{file_extension}"
+            storage_path = self._get_storage_path(folder, IMAGES_FOLDER)
+            blob_name = f"{storage_path}/{unique_filename}"
+            
+            # Get bucket and create blob
+            bucket = self.bucket
+            blob = bucket.blob(blob_name)
+            
+            # Upload from the file object's current contents
+            blob.upload_from_file(file_obj, rewind=True, content_type=content_type)
+            logger.info("Image streamed to GCS: gs://%s/%s", self.bucket_name, blob_name)
+            
+            return f"/{blob_name}"
+            
+        except Exception as e:
+            logger.error("Error streaming image to GCS: %s", e)
             return None
 
     def upload_html(self, html_content: str, filename: str, folder=DEFAULT_FOLDER) -> str:
@@ -134,7 +185,7 @@ class StorageService:
         Returns:
             Public URL of the uploaded HTML file
         """
-        logger.info(f"Uploading HTML content to GCS: {filename}")
+        logger.info("Uploading HTML content to GCS: %s", filename)
         
         try:
             # Generate blob name with HTML folder
@@ -142,7 +193,7 @@ class StorageService:
             blob_name = f"{storage_path}/{filename}.html"
             
             # Get bucket and create blob
-            bucket = self.client.bucket(self.bucket_name)
+            bucket = self.bucket
             blob = bucket.blob(blob_name)
             
             # Set cache control
@@ -153,22 +204,22 @@ class StorageService:
                 content_type='text/html',
                 num_retries=3
             )
-            logger.info(f"HTML uploaded to GCS: gs://{self.bucket_name}/{blob_name}")
+            logger.info("HTML uploaded to GCS: gs://%s/%s", self.bucket_name, blob_name)
             
             # Get URL with domain if available
             if settings.domain:
                 # Use custom domain
                 public_url = f"https://{settings.domain}/{blob_name}"
-                logger.info(f"Domain URL: {public_url}")
+                logger.info("Domain URL: %s", public_url)
             else:
                 # Fallback to GCS URL
                 public_url = f"https://storage.googleapis.com/{self.bucket_name}/{blob_name}"
-                logger.info(f"GCS URL: {public_url}")
+                logger.info("GCS URL: %s", public_url)
             
             return public_url
             
         except Exception as e:
-            logger.error(f"Error uploading HTML to GCS: {str(e)}")
+            logger.error("Error uploading HTML to GCS: %s", e)
             return None
 
     def list_reports(self, folder=DEFAULT_FOLDER) -> list:
@@ -181,11 +232,11 @@ class StorageService:
         Returns:
             List of dictionaries containing properties of HTML files
         """
-        logger.info(f"Listing reports in GCS folder: {folder}/{HTML_FOLDER}")
+        logger.info("Listing reports in GCS folder: %s/%s", folder, HTML_FOLDER)
         
         try:
             # Get bucket
-            bucket = self.client.bucket(self.bucket_name)
+            bucket = self.bucket
             # Create a prefix for the HTML folder
             prefix = self._get_storage_path(folder, HTML_FOLDER) + "/"
             blobs = bucket.list_blobs(prefix=prefix)
@@ -213,7 +264,7 @@ class StorageService:
             return html_files
             
         except Exception as e:
-            logger.error(f"Error listing reports in GCS: {str(e)}")
+            logger.error("Error listing reports in GCS: %s", e)
             return []
 
     def delete_report(self, report_path: str) -> bool:
@@ -226,27 +277,27 @@ class StorageService:
         Returns:
             bool: 刪除操作是否成功
         """
-        logger.info(f"Deleting report from GCS: {report_path}")
+        logger.info("Deleting report from GCS: %s", report_path)
         
         try:
             # 獲取 bucket
-            bucket = self.client.bucket(self.bucket_name)
+            bucket = self.bucket
             # 創建 blob
             blob = bucket.blob(report_path)
             
             # 檢查文件是否存在
             if not blob.exists():
-                logger.warning(f"Report file not found: {report_path}")
+                logger.warning("Report file not found: %s", report_path)
                 return False
                 
             # 刪除文件
             blob.delete()
-            logger.info(f"Report deleted from GCS: {report_path}")
+            logger.info("Report deleted from GCS: %s", report_path)
             
             return True
             
         except Exception as e:
-            logger.error(f"Error deleting report from GCS: {str(e)}")
+            logger.error("Error deleting report from GCS: %s", e)
             return False
             
     def get_report_content(self, report_path: str) -> str:
@@ -259,25 +310,25 @@ class StorageService:
         Returns:
             str: 報告的 HTML 內容，如果獲取失敗則返回 None
         """
-        logger.info(f"Getting report content from GCS: {report_path}")
+        logger.info("Getting report content from GCS: %s", report_path)
         
         try:
             # 獲取 bucket
-            bucket = self.client.bucket(self.bucket_name)
+            bucket = self.bucket
             # 創建 blob
             blob = bucket.blob(report_path)
             
             # 檢查文件是否存在
             if not blob.exists():
-                logger.warning(f"Report file not found: {report_path}")
+                logger.warning("Report file not found: %s", report_path)
                 return None
                 
             # 獲取內容
             content = blob.download_as_text()
-            logger.info(f"Report content retrieved from GCS: {report_path}")
+            logger.info("Report content retrieved from GCS: %s", report_path)
             
             return content
             
         except Exception as e:
-            logger.error(f"Error getting report content from GCS: {str(e)}")
+            logger.error("Error getting report content from GCS: %s", e)
             return None
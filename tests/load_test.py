@@ -13,8 +13,10 @@ import aiohttp
 import time
 import logging
 from typing import Dict, Any, List
-import json
 import random
+import statistics
+import orjson
+from collections import Counter
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -29,32 +31,32 @@ SAMPLE_PAGE_IDS = [
     "1234abcdef5678abcdef9012abcdef34"
 ]
 
+# Request body sent by every load-test request (使用新的 API 格式)
+SAMPLE_CONTENT = "\n".join([
+    "今天我們學習了聖經故事。",
+    "孩子們唱了讚美詩歌。",
+    "我們一起做了手工。",
+    "大家都很開心地參與活動。"
+])
+# Serialized once so requests do not re-encode the same JSON body
+SAMPLE_PAYLOAD_BYTES = orjson.dumps({
+    "content": SAMPLE_CONTENT,
+    "image_paths": []
+})
+JSON_HEADERS = {"Content-Type": "application/json"}
+
 async def send_request(session: aiohttp.ClientSession, url: str, page_id: str) -> Dict[str, Any]:
     """Send a request to the API and return the result."""
     start_time = time.time()
     
     try:
-        # 使用新的 API 格式
-        sample_content = [
-            "今天我們學習了聖經故事。",
-            "孩子們唱了讚美詩歌。",
-            "我們一起做了手工。",
-            "大家都很開心地參與活動。"
-        ]
-        
-        async with session.post(
-            f"{url}/generate-report", 
-            json={
-                "content": "\n".join(sample_content),
-                "image_paths": []
-            },
-            timeout=30
-        ) as response:
+        async with session.post(f"{url}/generate-report", data=SAMPLE_PAYLOAD_BYTES, headers=JSON_HEADERS) as response:
             status = response.status
+            body = await response.read()
             try:
-                data = await response.json()
-            except:
-                data = await response.text()
+                data = orjson.loads(body)
+            except orjson.JSONDecodeError:
+                data = body.decode(errors="replace")
                 
             elapsed = time.time() - start_time
             return {
@@ -76,9 +78,9 @@ async def send_request(session: aiohttp.ClientSession, url: str, page_id: str) -
 async def health_check(session: aiohttp.ClientSession, url: str) -> Dict[str, Any]:
     """Check if the application is healthy."""
     try:
-        async with session.get(f"{url}/health", timeout=5) as response:
+        async with session.get(f"{url}/health", timeout=aiohttp.ClientTimeout(total=5)) as response:
             status = response.status
-            data = await response.json()
+            data = orjson.loads(await response.read())
             return {
                 "status": status,
                 "data": data
@@ -94,7 +96,18 @@ async def run_load_test(url: str, concurrency: int, num_requests: int) -> List[D
     """Run the load test with the specified parameters."""
     logger.info(f"Starting load test: {url}, concurrency={concurrency}, requests={num_requests}")
     
-    async with aiohttp.ClientSession() as session:
+    # Size the connection pool to the concurrency so every worker reuses a kept-alive connection
+    connector = aiohttp.TCPConnector(
+        limit=concurrency,
+        limit_per_host=concurrency,
+        ttl_dns_cache=300,
+        keepalive_timeout=30,
+        enable_cleanup_closed=True
+    )
+    async with aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=30)
+    ) as session:
         # First check if the application is healthy
         health_result = await health_check(session, url)
         if health_result["status"] != 200:
@@ -103,25 +116,26 @@ async def run_load_test(url: str, concurrency: int, num_requests: int) -> List[D
         
         logger.info(f"Health check passed: {health_result}")
         
-        # Create a list of tasks for the requests
-        tasks = []
-        for i in range(num_requests):
-            # Select a random page ID from the sample list
-            page_id = random.choice(SAMPLE_PAGE_IDS)
-            tasks.append(send_request(session, url, page_id))
-        
-        # Run the tasks with limited concurrency
-        semaphore = asyncio.Semaphore(concurrency)
+        # Queue the requests; only `concurrency` workers pull from it, so at most
+        # that many request coroutines exist at any time
+        queue: asyncio.Queue = asyncio.Queue()
+        # Select random page IDs from the sample list in one call
+        page_ids = random.choices(SAMPLE_PAGE_IDS, k=num_requests)
+        for item in enumerate(page_ids):
+            queue.put_nowait(item)
+        for _ in range(concurrency):
+            queue.put_nowait(None)
         
-        async def bounded_request(task):
-            async with semaphore:
-                return await task
+        results: List[Dict[str, Any]] = [None] * num_requests
         
-        bounded_tasks = [bounded_request(task) for task in tasks]
+        async def worker():
+            while (item := queue.get_nowait()) is not None:
+                index, page_id = item
+                results[index] = await send_request(session, url, page_id)
         
-        # Wait for all tasks to complete
+        # Wait for all workers to drain the queue
         start_time = time.time()
-        results = await asyncio.gather(*bounded_tasks)
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
         total_time = time.time() - start_time
         
         # Log the results
@@ -143,22 +157,23 @@ def analyze_results(results: List[Dict[str, Any]]) -> Dict[str, Any]:
     
     # Calculate statistics
     response_times = [r["elapsed"] for r in results]
-    status_codes = {}
-    for r in results:
-        status = r["status"]
-        if status in status_codes:
-            status_codes[status] += 1
-        else:
-            status_codes[status] = 1
+    status_codes = dict(Counter(r["status"] for r in results))
     
-    # Find min, max, avg, median, p95, p99 response times
-    response_times.sort()
-    min_time = min(response_times)
-    max_time = max(response_times)
-    avg_time = sum(response_times) / len(response_times)
-    median_time = response_times[len(response_times) // 2]
-    p95_time = response_times[int(len(response_times) * 0.95)]
-    p99_time = response_times[int(len(response_times) * 0.99)]
+    # Find min, max, avg in a single pass, then median, p95, p99 response times
+    min_time = max_time = response_times[0]
+    total_time = 0.0
+    for elapsed in response_times:
+        if elapsed < min_time:
+            min_time = elapsed
+        elif elapsed > max_time:
+            max_time = elapsed
+        total_time += elapsed
+    avg_time = total_time / len(response_times)
+    if len(response_times) > 1:
+        percentiles = statistics.quantiles(response_times, n=100, method="inclusive")
+        median_time, p95_time, p99_time = percentiles[49], percentiles[94], percentiles[98]
+    else:
+        median_time = p95_time = p99_time = response_times[0]
     
     return {
         "total_requests": len(results),
@@ -187,12 +202,12 @@ def main():
     
     # Analyze and display the results
     analysis = analyze_results(results)
-    logger.info(f"Analysis: {json.dumps(analysis, indent=2)}")
+    logger.info(f"Analysis: {orjson.dumps(analysis, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode()}")
     
     # Save detailed results if requested
     if args.output:
-        with open(args.output, "w") as f:
-            json.dump({"results": results, "analysis": analysis}, f, indent=2)
+        with open(args.output, "wb") as f:
+            f.write(orjson.dumps({"results": results, "analysis": analysis}, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
         logger.info(f"Detailed results saved to {args.output}")
 
 if __name__ == "__main__":
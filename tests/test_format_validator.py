@@ -1,7 +1,7 @@
 import os
 import logging
 from dotenv import load_dotenv
-from services.format_validator_service import FormatValidatorService
+from services.format_validator_service import FormatValidatorService, NEEDS_FIX_RE
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -76,6 +76,37 @@ def test_format_validator():
         logger.error(f"Error testing format validator: {str(e)}")
         return False, None
 
+def test_precheck_malformed_images():
+    """Malformed image syntax must not take the already-compatible fast path"""
+    validator = FormatValidatorService("dummy-key")
+    
+    # Well-formed images need no validation
+    assert not NEEDS_FIX_RE.search("# 活動照片\n\n![主日學活動](https://example.com/photo.jpg)")
+    
+    # Missing or detached (url) parts are detected
+    for content in [
+        "![主日學活動] (https://example.com/photo.jpg)",
+        "![主日學活動](https://example.com/photo.jpg",
+        "![主日學活動]",
+    ]:
+        assert NEEDS_FIX_RE.search(content), content
+    
+    # Without the Gemini fallback the content is returned unchanged
+    assert validator.validate_markdown_format("![主日學活動] (https://example.com/photo.jpg)") == (
+        True, "![主日學活動] (https://example.com/photo.jpg)"
+    )
+
+def test_autolinks_keep_their_url():
+    """Markdown autolinks are unwrapped to bare URLs instead of being stripped as HTML tags"""
+    validator = FormatValidatorService("dummy-key")
+    
+    assert validator.validate_markdown_format("參考 <https://example.com/a>") == (
+        True, "參考 https://example.com/a"
+    )
+    assert validator.validate_markdown_format("<b>聯絡</b> <mailto:teacher@example.com>") == (
+        True, "**聯絡** mailto:teacher@example.com"
+    )
+
 if __name__ == "__main__":
     if not GEMINI_API_KEY:
         logger.error("GEMINI_API_KEY environment variable is not set. Please set it in the .env file")
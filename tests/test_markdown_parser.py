@@ -2,7 +2,8 @@
 測試 Markdown 解析器對於帶有星號的文本的處理。
 """
 import json
-from utils.markdown.parser import MarkdownParser
+from utils.markdown.parser import MarkdownParser, MAX_PARAGRAPH_LENGTH
+from utils.notion.block_builder import NotionBlockBuilder
 import re
 
 def print_rich_text(rich_text):
@@ -127,6 +128,39 @@ def test_process_content():
                 if item.get("annotations"):
                     print(f"  註釋: {item.get('annotations')}")
             
+def test_paragraphs_keep_blank_line():
+    """測試合併的相鄰段落之間保留空行"""
+    parser = MarkdownParser()
+    blocks = parser.process_content(["第一段內容", "", "第二段內容"])
+    
+    paragraphs = [block for block in blocks if block["type"] == "paragraph"]
+    assert len(paragraphs) == 1
+    text = "".join(item["text"]["content"] for item in paragraphs[0]["rich_text"])
+    assert text == "第一段內容\n\n第二段內容"
+
+def test_report_paragraphs_are_coalesced():
+    """測試報告段落列表在建立區塊時合併，且段落內的標題仍被識別"""
+    blocks = NotionBlockBuilder().build_page_blocks({
+        "content": ["## 主題\n今天的重點", "第一段內容", "第二段內容"]
+    })
+    
+    headings = [block for block in blocks if block["type"].startswith("heading")]
+    assert any("主題" in item["text"]["content"] for block in headings for item in block["rich_text"])
+    paragraphs = [block for block in blocks if block["type"] == "paragraph" and "rich_text" in block]
+    texts = ["".join(item["text"]["content"] for item in block["rich_text"]) for block in paragraphs]
+    assert "今天的重點\n\n第一段內容\n\n第二段內容" in texts
+
+def test_accumulated_text_respects_limit():
+    """測試累積的連續文字行不超過 Notion 的段落長度上限"""
+    parser = MarkdownParser()
+    line = "字" * 600
+    blocks = parser.process_content([line] * 5)
+    
+    paragraphs = [block for block in blocks if block["type"] == "paragraph"]
+    assert len(paragraphs) > 1
+    for block in paragraphs:
+        assert sum(len(item["text"]["content"]) for item in block["rich_text"]) <= MAX_PARAGRAPH_LENGTH
+
 if __name__ == "__main__":
     # 只運行整段內容測試，以便查看所有區塊
     test_process_content() 
\ No newline at end of file
@@ -0,0 +1,55 @@
+"""
+測試微批次處理器：批次結果的對應，以及慢批次不阻塞後續批次。
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.common.micro_batcher import MicroBatcher
+
+def test_results_match_items():
+    """每個提交的項目都應取回自己的結果"""
+    batcher = MicroBatcher(lambda items: [item * 2 for item in items], max_batch=4, max_wait=0.01)
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        results = list(executor.map(batcher.submit, range(10)))
+    assert results == [item * 2 for item in range(10)]
+
+def test_batches_run_concurrently():
+    """一個批次處理中時，下一個批次應可同時開始"""
+    started = threading.Event()
+    release = threading.Event()
+
+    def batch_fn(items):
+        if items == ["slow"]:
+            started.set()
+            release.wait(5)
+        return items
+
+    batcher = MicroBatcher(batch_fn, max_batch=1, max_wait=0, max_concurrency=2)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        slow = executor.submit(batcher.submit, "slow")
+        assert started.wait(5)
+        begin = time.monotonic()
+        assert batcher.submit("fast") == "fast"
+        assert time.monotonic() - begin < 1
+        release.set()
+        assert slow.result(5) == "slow"
+
+def test_batch_error_propagates():
+    """批次函數出錯時，所有等待的呼叫者都應收到例外"""
+    def batch_fn(items):
+        raise RuntimeError("boom")
+
+    batcher = MicroBatcher(batch_fn, max_batch=2, max_wait=0.01)
+    try:
+        batcher.submit("x")
+    except RuntimeError as e:
+        assert str(e) == "boom"
+    else:
+        raise AssertionError("expected RuntimeError")
+
+if __name__ == "__main__":
+    test_results_match_items()
+    test_batches_run_concurrently()
+    test_batch_error_propagates()
+    print("=== 測試完成 ===")
@@ -0,0 +1,48 @@
+"""
+測試從已渲染的 GCS 報告中取回原始 Markdown 以供編輯。
+"""
+from jinja2 import Environment, FileSystemLoader
+
+from services.report_service import ReportService
+
+class FakeStorageService:
+    """只回傳固定 HTML 的存儲服務"""
+
+    def __init__(self, html_content):
+        self.html_content = html_content
+
+    def get_report_content(self, report_path):
+        return self.html_content
+
+class FakePlatform:
+    """帶有存儲服務的輸出平台"""
+
+    def __init__(self, html_content):
+        self.storage_service = FakeStorageService(html_content)
+
+def render_report(title, original_markdown):
+    """以與 GCSPlatform 相同的設定渲染報告模板"""
+    env = Environment(loader=FileSystemLoader("templates"), autoescape=True)
+    return env.get_template("reports/report_template.html").render(
+        title=title,
+        content_html="<p>內容</p>",
+        images_html="",
+        original_content="原始筆記",
+        original_markdown=original_markdown
+    )
+
+def test_get_report_for_editing():
+    """原始 Markdown（包含引號和特殊字元）應完整取回"""
+    markdown = '# 標題 🌈\n\n他說："神愛世人" & <小朋友> 都\'很開心\''
+    html_content = render_report("主日學週報<br>2025-03-06", markdown)
+    service = ReportService(None, FakePlatform(html_content), None)
+
+    result = service.get_report_for_editing("reports/2025-03-06.html")
+
+    assert result["markdown_content"] == markdown
+    assert result["report_date"] == "2025-03-06"
+    assert result["report_title"] == "主日學週報2025-03-06"
+
+if __name__ == "__main__":
+    test_get_report_for_editing()
+    print("=== 測試完成 ===")
@@ -140,7 +140,7 @@ def generate_and_post_report(
     logger.info(f"Content length: {len(content)} characters")
     
     # Store original database ID before any operations
-    original_database_id = os.environ.get("NOTION_DATABASE_ID")
+    original_database_id = notion_service.database_id
     
     # Set a flag to track if we've modified the database ID
     database_id_modified = False
@@ -163,7 +163,7 @@ def generate_and_post_report(
         
         # Override the database ID if provided
         if target_database_id:
-            os.environ["NOTION_DATABASE_ID"] = target_database_id
+            notion_service.database_id = target_database_id
             database_id_modified = True
             logger.info(f"Using target Notion database: {target_database_id}")
         
@@ -192,7 +192,7 @@ def generate_and_post_report(
     finally:
         # Restore original database ID if it was overridden
         if database_id_modified and original_database_id:
-            os.environ["NOTION_DATABASE_ID"] = original_database_id
+            notion_service.database_id = original_database_id
             logger.debug("Restored original Notion database ID")
 
 def main():
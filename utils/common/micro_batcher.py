@@ -0,0 +1,105 @@
+"""
+Micro-batching utilities for the class report application.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, List
+
+from utils.common.logging_utils import get_logger
+
+logger = get_logger("micro_batcher")
+
+class MicroBatcher:
+    """
+    Collect items submitted from many threads and process them in batches.
+
+    Callers block on submit() while a single collector thread drains the queue,
+    waiting at most max_wait seconds (or until max_batch items arrive) before
+    handing the batch to batch_fn. Batches run on a pool of max_concurrency
+    threads, so a slow batch doesn't hold back the next one; when every slot is
+    busy the collector waits, letting more items accumulate into the next batch.
+    """
+
+    def __init__(self, batch_fn: Callable[[List[Any]], List[Any]], max_batch: int = 8, max_wait: float = 0.03,
+                 max_concurrency: int = 4):
+        """
+        Initialize the batcher.
+
+        Args:
+            batch_fn: Function that takes a list of items and returns a list of results in the same order
+            max_batch: Maximum number of items per batch
+            max_wait: Maximum time in seconds to wait for a batch to fill
+            max_concurrency: Maximum number of batches processed at the same time
+        """
+        self.batch_fn = batch_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._worker = None
+        self._executor = None
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self.max_concurrency = max_concurrency
+        self._lock = threading.Lock()
+
+    def submit(self, item: Any) -> Any:
+        """
+        Submit an item and block until its result is available.
+
+        Args:
+            item: The item to process
+
+        Returns:
+            The result produced by batch_fn for this item
+        """
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((item, future))
+        return future.result()
+
+    def _ensure_worker(self) -> None:
+        """Start the worker thread on first use"""
+        if self._worker is not None:
+            return
+        with self._lock:
+            if self._worker is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="micro-batch")
+                self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+                self._worker.start()
+
+    def _run(self) -> None:
+        """Collector loop: gather a batch and hand it to the executor once a slot is free"""
+        while True:
+            self._slots.acquire()
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            try:
+                while len(batch) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                pass
+
+            self._executor.submit(self._process, batch)
+
+    def _process(self, batch: List[Any]) -> None:
+        """Run batch_fn on one batch and resolve the waiting futures"""
+        try:
+            items = [item for item, _ in batch]
+            logger.info("Processing batch of %s items", len(items))
+            try:
+                results = self.batch_fn(items)
+                if len(results) != len(items):
+                    raise ValueError(f"Batch function returned {len(results)} results for {len(items)} items")
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                return
+
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+        finally:
+            self._slots.release()
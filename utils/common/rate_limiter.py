@@ -0,0 +1,73 @@
+"""
+Rate limiting utilities for the class report application.
+"""
+import threading
+import time
+
+class RateLimiter:
+    """
+    Thread-safe token bucket limiting calls to max_rate per time_period seconds.
+
+    Use as a context manager around outbound API calls; callers block until a
+    token is available, which keeps bursts below the upstream limit instead of
+    triggering 429 responses and retries. acquire(cost) takes several tokens at
+    once, e.g. to budget estimated tokens per minute rather than calls.
+    """
+
+    def __init__(self, max_rate: float, time_period: float = 1.0):
+        """
+        Initialize the rate limiter.
+
+        Args:
+            max_rate: Maximum number of calls allowed per time period
+            time_period: Length of the time period in seconds
+        """
+        self.max_rate = max_rate
+        self.rate_per_sec = max_rate / time_period
+        self._tokens = max_rate
+        self._last = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, cost: float = 1) -> None:
+        """
+        Block until a call is allowed.
+
+        Args:
+            cost: Number of tokens the call consumes (capped at max_rate)
+        """
+        cost = min(cost, self.max_rate)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.max_rate, self._tokens + (now - self._last) * self.rate_per_sec)
+                self._last = now
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                elif self._tokens >= cost:
+                    self._tokens -= cost
+                    return
+                else:
+                    wait = (cost - self._tokens) / self.rate_per_sec
+            time.sleep(wait)
+
+    def penalize(self, delay: float) -> None:
+        """
+        Hold back all callers for delay seconds, e.g. after the upstream API
+        rejected a call with 429 / Retry-After.
+
+        Args:
+            delay: Time in seconds before the next call is allowed
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._paused_until = max(self._paused_until, now + delay)
+            self._tokens = 0
+            self._last = now
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
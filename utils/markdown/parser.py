@@ -10,6 +10,12 @@ from utils.common.logging_utils import get_logger
 
 logger = get_logger(__name__)
 
+# Notion limits: 2000 characters per rich text object, 100 rich text objects per block
+MAX_PARAGRAPH_LENGTH = 2000
+MAX_RICH_TEXT_ITEMS = 100
+# Inserted between coalesced paragraphs so they keep their blank-line spacing
+PARAGRAPH_SEPARATOR = "\n\n"
+
 class BlockType(Enum):
     """Block types supported by the parser."""
     PARAGRAPH = "paragraph"
@@ -50,39 +56,39 @@ class Block:
 class MarkdownParser:
     """Parser for Markdown text to Notion format."""
     
-    # Regex patterns
+    # Regex patterns, compiled once when the class is defined
     PATTERNS = {
-        'link': r'\[([^\]]+)\]\(([^)]+)\)',
-        'bold_italic': r'\*\*\*((?:[^*]|\*(?!\*\*))*)\*\*\*',
-        'bold': r'\*\*((?:[^*]|\*(?!\*))*)\*\*',
-        'italic': r'(?<!\*)\*((?:[^*]|\*(?!\*))*)\*(?!\*)',
-        'url': r'((?:https?://[^\s<>"]+)|(?:www\.[^\s<>"]+))',
+        'link': re.compile(r'\[([^\]]+)\]\(([^)]+)\)'),
+        'bold_italic': re.compile(r'\*\*\*((?:[^*]|\*(?!\*\*))*)\*\*\*'),
+        'bold': re.compile(r'\*\*((?:[^*]|\*(?!\*))*)\*\*'),
+        'italic': re.compile(r'(?<!\*)\*((?:[^*]|\*(?!\*))*)\*(?!\*)'),
+        'url': re.compile(r'((?:https?://[^\s<>"]+)|(?:www\.[^\s<>"]+))'),
         'youtube': [
-            r'^\s*\[(.*?)\]\((https?://(?:www\.)?(?:youtube\.com/watch\?v=|youtu\.be/|youtube\.com/shorts/))([a-zA-Z0-9_-]+)(?:[^\)]*?))\)\s*$',
-            r'^\s*https?://(?:www\.)?(?:youtube\.com/watch\?v=|youtu\.be/|youtube\.com/shorts/)([a-zA-Z0-9_-]+)(?:[^\s]*?)\s*$'
+            re.compile(r'^\s*\[(.*?)\]\((https?://(?:www\.)?(?:youtube\.com/watch\?v=|youtu\.be/|youtube\.com/shorts/)([a-zA-Z0-9_-]+)(?:[^\)]*?))\)\s*$'),
+            re.compile(r'^\s*https?://(?:www\.)?(?:youtube\.com/watch\?v=|youtu\.be/|youtube\.com/shorts/)([a-zA-Z0-9_-]+)(?:[^\s]*?)\s*$')
         ],
-        'heading': r'^(#{1,6})(?:\s+|\s*(?=[^\s#]))(.*?)(?:\s+#*)?$',
-        'numbered_list': r'^(\s*)(\d+)\.[\s]+(.*)',
-        'list_item': r'^(\s*)[•\-\*]\s+(.*)',
-        'blockquote': r'^>\s*(.*)',
-        'nested_blockquote': r'^>\s+>\s+(.*)',
-        'horizontal_rule': r'^-{3,}$'
+        'heading': re.compile(r'^(#{1,6})(?:\s+|\s*(?=[^\s#]))(.*?)(?:\s+#*)?$'),
+        'numbered_list': re.compile(r'^(\s*)(\d+)\.[\s]+(.*)'),
+        'list_item': re.compile(r'^(\s*)[•\-\*]\s+(.*)'),
+        'blockquote': re.compile(r'^>\s*(.*)'),
+        'nested_blockquote': re.compile(r'^>\s+>\s+(.*)'),
+        'horizontal_rule': re.compile(r'^-{3,}$')
     }
 
     # Emoji mapping for headings
     EMOJI_MAPPING = {
-        r'(?:詩歌|歌曲|音樂|讚美|敬拜)': "🎵",
-        r'(?:主題|主旨|重點|核心|目標)': "👑",
-        r'(?:啟示|啟發|亮光|領受|感動)': "✨",
-        r'(?:活動|遊戲|互動|分組|團康)': "🎮",
-        r'(?:故事|聖經|經文|信息|見證)': "📖",
-        r'(?:禱告|祈禱|代禱|守望)': "🙏",
-        r'(?:分享|交流|討論|回應)': "💝",
-        r'(?:問題|思考|反思|探討)': "💭",
-        r'(?:總結|結論|回顧|整理)': "📝",
-        r'(?:時間|日期|行程|安排)': "⏰",
-        r'(?:地點|場地|位置)': "📍",
-        r'(?:人員|同工|服事|配搭)': "👥"
+        re.compile(r'(?:詩歌|歌曲|音樂|讚美|敬拜)', re.IGNORECASE): "🎵",
+        re.compile(r'(?:主題|主旨|重點|核心|目標)', re.IGNORECASE): "👑",
+        re.compile(r'(?:啟示|啟發|亮光|領受|感動)', re.IGNORECASE): "✨",
+        re.compile(r'(?:活動|遊戲|互動|分組|團康)', re.IGNORECASE): "🎮",
+        re.compile(r'(?:故事|聖經|經文|信息|見證)', re.IGNORECASE): "📖",
+        re.compile(r'(?:禱告|祈禱|代禱|守望)', re.IGNORECASE): "🙏",
+        re.compile(r'(?:分享|交流|討論|回應)', re.IGNORECASE): "💝",
+        re.compile(r'(?:問題|思考|反思|探討)', re.IGNORECASE): "💭",
+        re.compile(r'(?:總結|結論|回顧|整理)', re.IGNORECASE): "📝",
+        re.compile(r'(?:時間|日期|行程|安排)', re.IGNORECASE): "⏰",
+        re.compile(r'(?:地點|場地|位置)', re.IGNORECASE): "📍",
+        re.compile(r'(?:人員|同工|服事|配搭)', re.IGNORECASE): "👥"
     }
 
     def __init__(self):
@@ -99,32 +105,32 @@ class MarkdownParser:
         segments = []
         
         # Find links
-        for match in re.finditer(self.PATTERNS['link'], line):
+        for match in self.PATTERNS['link'].finditer(line):
             text, url = match.groups()
             start, end = match.span()
             segments.append(TextSegment(start, end, text, TextType.LINK, url))
         
         # Find bold_italic text
-        for match in re.finditer(self.PATTERNS['bold_italic'], line):
+        for match in self.PATTERNS['bold_italic'].finditer(line):
             text = match.group(1)
             start, end = match.span()
             segments.append(TextSegment(start, end, text, TextType.BOLD_ITALIC))
         
         # Find bold text
-        for match in re.finditer(self.PATTERNS['bold'], line):
+        for match in self.PATTERNS['bold'].finditer(line):
             text = match.group(1)
             start, end = match.span()
             if not any(s.type == TextType.BOLD_ITALIC and start >= s.start and end <= s.end for s in segments):
                 segments.append(TextSegment(start, end, text, TextType.BOLD))
         
         # Find italic text
-        for match in re.finditer(self.PATTERNS['italic'], line):
+        for match in self.PATTERNS['italic'].finditer(line):
             text = match.group(1)
             start, end = match.span()
             segments.append(TextSegment(start, end, text, TextType.ITALIC))
         
         # Find URLs
-        for match in re.finditer(self.PATTERNS['url'], line):
+        for match in self.PATTERNS['url'].finditer(line):
             url = match.group(1)
             start, end = match.span()
             segments.append(TextSegment(
@@ -182,7 +188,7 @@ class MarkdownParser:
     def _get_heading_emoji(self, text: str) -> str:
         """Get appropriate emoji for heading text."""
         for pattern, emoji in self.EMOJI_MAPPING.items():
-            if re.search(pattern, text, re.IGNORECASE):
+            if pattern.search(text):
                 return emoji
         return "🔔"
 
@@ -227,14 +233,41 @@ class MarkdownParser:
             }
         )
 
+    @staticmethod
+    def _rich_text_length(rich_text: List[Dict[str, Any]]) -> int:
+        """Total number of characters in a list of rich text objects."""
+        return sum(len(item["text"]["content"]) for item in rich_text)
+
     def _flush_current_text(self) -> None:
-        """Flush accumulated text as a paragraph block."""
-        if self.current_text:
+        """
+        Flush accumulated text as a paragraph block.
+        
+        Consecutive paragraphs are coalesced into one block (separated by a blank line)
+        while they stay within Notion's rich text limits, so short paragraphs don't each
+        cost a block in the create/append requests.
+        """
+        if not self.current_text:
+            return
+        
+        rich_text = self._parse_line_to_rich_text(self.current_text)
+        previous = self.blocks[-1] if self.blocks else None
+        if (
+            previous is not None
+            and previous.type == BlockType.PARAGRAPH
+            and self._rich_text_length(previous.content["rich_text"]) + len(self.current_text) + len(PARAGRAPH_SEPARATOR) <= MAX_PARAGRAPH_LENGTH
+            and len(previous.content["rich_text"]) + len(rich_text) + 1 <= MAX_RICH_TEXT_ITEMS
+        ):
+            previous.content["rich_text"].append({
+                "type": "text",
+                "text": {"content": PARAGRAPH_SEPARATOR}
+            })
+            previous.content["rich_text"].extend(rich_text)
+        else:
             self.blocks.append(Block(
                 type=BlockType.PARAGRAPH,
-                content={"rich_text": self._parse_line_to_rich_text(self.current_text)}
+                content={"rich_text": rich_text}
             ))
-            self.current_text = ""
+        self.current_text = ""
 
     def process_content(self, content: List[str]) -> List[Dict[str, Any]]:
         """
@@ -259,8 +292,8 @@ class MarkdownParser:
         
         for line in content:
             line = line.rstrip()
-            youtube_match1 = re.match(self.PATTERNS['youtube'][0], line)
-            youtube_match2 = re.match(self.PATTERNS['youtube'][1], line)
+            youtube_match1 = self.PATTERNS['youtube'][0].match(line)
+            youtube_match2 = self.PATTERNS['youtube'][1].match(line)
             
             if youtube_match1 or youtube_match2:
                 youtube_lines.append(line)
@@ -279,12 +312,12 @@ class MarkdownParser:
                 
                 # 檢查這是否是 YouTube 連結的佔位符
                 if i < len(content) and (
-                    re.match(self.PATTERNS['youtube'][0], content[i].rstrip()) or 
-                    re.match(self.PATTERNS['youtube'][1], content[i].rstrip())
+                    self.PATTERNS['youtube'][0].match(content[i].rstrip()) or 
+                    self.PATTERNS['youtube'][1].match(content[i].rstrip())
                 ):
                     original_line = content[i].rstrip()
-                    youtube_match1 = re.match(self.PATTERNS['youtube'][0], original_line)
-                    youtube_match2 = re.match(self.PATTERNS['youtube'][1], original_line)
+                    youtube_match1 = self.PATTERNS['youtube'][0].match(original_line)
+                    youtube_match2 = self.PATTERNS['youtube'][1].match(original_line)
                     
                     if youtube_match1:
                         text, url, video_id = youtube_match1.groups()
@@ -334,7 +367,7 @@ class MarkdownParser:
                 continue
             
             # Handle headings
-            heading_match = re.match(self.PATTERNS['heading'], line)
+            heading_match = self.PATTERNS['heading'].match(line)
             if heading_match:
                 self._flush_current_text()
                 level = len(heading_match.group(1))
@@ -344,7 +377,7 @@ class MarkdownParser:
                 continue
             
             # Handle lists
-            list_match = re.match(self.PATTERNS['list_item'], line)
+            list_match = self.PATTERNS['list_item'].match(line)
             if list_match:
                 self._flush_current_text()
                 text = list_match.group(2)
@@ -353,7 +386,7 @@ class MarkdownParser:
                 continue
             
             # Handle numbered lists
-            numbered_match = re.match(self.PATTERNS['numbered_list'], line)
+            numbered_match = self.PATTERNS['numbered_list'].match(line)
             if numbered_match:
                 self._flush_current_text()
                 text = numbered_match.group(3)
@@ -362,7 +395,7 @@ class MarkdownParser:
                 continue
             
             # Handle blockquotes
-            quote_match = re.match(self.PATTERNS['blockquote'], line)
+            quote_match = self.PATTERNS['blockquote'].match(line)
             if quote_match:
                 self._flush_current_text()
                 text = quote_match.group(1)
@@ -379,13 +412,15 @@ class MarkdownParser:
                 continue
             
             # Handle horizontal rules
-            if re.match(self.PATTERNS['horizontal_rule'], line) or line == '---':
+            if self.PATTERNS['horizontal_rule'].match(line) or line == '---':
                 self._flush_current_text()
                 self.blocks.append(Block(type=BlockType.DIVIDER, content={}))
                 i += 1
                 continue
             
-            # Accumulate regular text
+            # Accumulate regular text, starting a new paragraph before it would exceed Notion's limit
+            if self.current_text and len(self.current_text) + 1 + len(line) > MAX_PARAGRAPH_LENGTH:
+                self._flush_current_text()
             if self.current_text:
                 self.current_text += " " + line
             else:
@@ -2,12 +2,67 @@
 Notion API wrapper for the class report application.
 """
 import os
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
 from typing import Dict, List, Any, Optional
 from utils.common.logging_utils import get_logger
+from utils.common.rate_limiter import RateLimiter
 
 logger = get_logger(__name__)
 
+# Notion allows an average of 3 requests per second per integration;
+# shared by all clients so the whole process stays under the limit
+notion_rate_limiter = RateLimiter(3, 1.0)
+
+# Connection pool size for the shared session (requests run from the threadpool)
+POOL_MAXSIZE = 50
+REQUEST_TIMEOUT = 30
+
+# Notion accepts at most 100 children per create/append request
+MAX_CHILDREN_PER_REQUEST = 100
+
+# Retry rate-limited requests for every method, and transient gateway errors with
+# exponential backoff only for reads: a 502/503 can arrive after Notion already
+# created the page (POST) or appended the children (PATCH), so writes are never
+# retried on them
+RATE_LIMIT_STATUS_CODE = 429
+GATEWAY_RETRY_STATUS_CODES = frozenset({502, 503})
+GATEWAY_RETRY_METHODS = frozenset({"GET"})
+MAX_RETRIES = 3
+RETRY_BACKOFF = 0.5
+
+def _retry_delay(response: requests.Response, attempt: int) -> float:
+    """
+    Work out how long to wait before retrying a request.
+    
+    Args:
+        response: The response that triggered the retry
+        attempt: Zero-based attempt number, used for the exponential backoff
+        
+    Returns:
+        The Retry-After value in seconds (either delay-seconds or an HTTP-date),
+        or the exponential backoff when the header is missing or unparseable
+    """
+    backoff = RETRY_BACKOFF * 2 ** attempt
+    retry_after = response.headers.get("Retry-After")
+    if not retry_after:
+        return backoff
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return backoff
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
 class NotionApiClient:
     """
     Wrapper for the Notion API.
@@ -25,7 +80,7 @@ class NotionApiClient:
         
         # Log a masked version of the API key for debugging
         masked_key = api_key[:4] + "..." + api_key[-4:] if len(api_key) > 8 else "***"
-        logger.info(f"Using Notion API key: {masked_key}")
+        logger.info("Using Notion API key: %s", masked_key)
         
         self.api_key = api_key
         self.base_url = "https://api.notion.com/v1"
@@ -39,8 +94,49 @@ class NotionApiClient:
             "Notion-Version": "2022-06-28"
         }
         
+        # Reuse keep-alive connections across calls instead of a new TLS handshake per request
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.session.mount("https://", HTTPAdapter(pool_maxsize=POOL_MAXSIZE))
+        
         logger.info("Notion API client initialized successfully")
     
+    def _request(self, method: str, path: str, json: Any = None, **kwargs) -> Dict[str, Any]:
+        """
+        Send a rate-limited request to the Notion API.
+        
+        Args:
+            method: The HTTP method
+            path: The API path, relative to the base URL
+            json: Optional request body, serialized with orjson
+            **kwargs: Extra arguments passed to requests
+            
+        Returns:
+            The decoded JSON response, after raising for HTTP error statuses
+        """
+        kwargs.setdefault("timeout", REQUEST_TIMEOUT)
+        if json is not None:
+            # The session already sends Content-Type: application/json
+            kwargs["data"] = orjson.dumps(json)
+        retry_status_codes = {RATE_LIMIT_STATUS_CODE}
+        if method.upper() in GATEWAY_RETRY_METHODS:
+            retry_status_codes |= GATEWAY_RETRY_STATUS_CODES
+        for attempt in range(MAX_RETRIES + 1):
+            with notion_rate_limiter:
+                response = self.session.request(method, f"{self.base_url}{path}", **kwargs)
+            if response.status_code not in retry_status_codes or attempt == MAX_RETRIES:
+                break
+            # Honour Retry-After when Notion sends it, otherwise back off exponentially
+            delay = _retry_delay(response, attempt)
+            logger.warning("Notion API returned %s, retrying in %.1fs", response.status_code, delay)
+            time.sleep(delay)
+        response.raise_for_status()
+        return orjson.loads(response.content)
+    
+    def close(self) -> None:
+        """Close the underlying HTTP session and its pooled connections."""
+        self.session.close()
+    
     def get_page(self, page_id: str) -> Dict[str, Any]:
         """
         Get a page from Notion.
@@ -51,15 +147,9 @@ class NotionApiClient:
         Returns:
             The page data
         """
-        logger.info(f"Getting page: {page_id}")
+        logger.info("Getting page: %s", page_id)
         
-        response = requests.get(
-            f"{self.base_url}/pages/{page_id}",
-            headers=self.headers
-        )
-        response.raise_for_status()
-        
-        return response.json()
+        return self._request("GET", f"/pages/{page_id}")
     
     def get_page_blocks(self, page_id: str) -> List[Dict[str, Any]]:
         """
@@ -69,17 +159,20 @@ class NotionApiClient:
             page_id: The ID of the page
             
         Returns:
-            The blocks of the page
+            The blocks of the page, following pagination until every block is fetched
         """
-        logger.info(f"Getting blocks for page: {page_id}")
-        
-        response = requests.get(
-            f"{self.base_url}/blocks/{page_id}/children",
-            headers=self.headers
-        )
-        response.raise_for_status()
-        
-        return response.json()["results"]
+        logger.info("Getting blocks for page: %s", page_id)
+        
+        blocks = []
+        params = {"page_size": MAX_CHILDREN_PER_REQUEST}
+        while True:
+            data = self._request("GET", f"/blocks/{page_id}/children", params=params)
+            blocks.extend(data["results"])
+            if not data.get("has_more"):
+                break
+            params["start_cursor"] = data["next_cursor"]
+        
+        return blocks
     
     def create_page(self, database_id: str, title: str, blocks: List[Dict[str, Any]]) -> str:
         """
@@ -93,7 +186,7 @@ class NotionApiClient:
         Returns:
             The ID of the newly created page
         """
-        logger.info(f"Creating page in database: {database_id}")
+        logger.info("Creating page in database: %s", database_id)
         
         # Prepare the request body
         data = {
@@ -109,19 +202,18 @@ class NotionApiClient:
                     ]
                 }
             },
-            "children": blocks
+            "children": blocks[:MAX_CHILDREN_PER_REQUEST]
         }
         
         # Create the page
-        response = requests.post(
-            f"{self.base_url}/pages",
-            headers=self.headers,
-            json=data
-        )
-        response.raise_for_status()
+        page_id = self._request("POST", "/pages", json=data)["id"]
+        logger.info("Created page: %s", page_id)
         
-        page_id = response.json()["id"]
-        logger.info(f"Created page: {page_id}")
+        # Append the remaining blocks in order, one request per chunk
+        for start in range(MAX_CHILDREN_PER_REQUEST, len(blocks), MAX_CHILDREN_PER_REQUEST):
+            chunk = blocks[start:start + MAX_CHILDREN_PER_REQUEST]
+            self._request("PATCH", f"/blocks/{page_id}/children", json={"children": chunk})
+            logger.info("Appended %s blocks to page: %s", len(chunk), page_id)
         
         return page_id
     
@@ -136,17 +228,12 @@ class NotionApiClient:
         Returns:
             True if successful, False otherwise
         """
-        logger.info(f"Appending blocks to block: {block_id}")
+        logger.info("Appending blocks to block: %s", block_id)
         
         try:
-            response = requests.patch(
-                f"{self.base_url}/blocks/{block_id}/children",
-                headers=self.headers,
-                json={"children": blocks}
-            )
-            response.raise_for_status()
+            self._request("PATCH", f"/blocks/{block_id}/children", json={"children": blocks})
             
             return True
         except Exception as e:
-            logger.error(f"Error appending blocks: {str(e)}")
+            logger.error("Error appending blocks: %s", e)
             return False 
\ No newline at end of file
@@ -1,11 +1,126 @@
 """
 Notion block builder for the class report application.
 """
+from copy import deepcopy
 from typing import Dict, List, Any, Optional
 from utils.common.logging_utils import get_logger
+from utils.markdown.parser import MarkdownParser
 
 logger = get_logger(__name__)
 
+# Block types whose rich_text is extracted as content
+TEXT_BLOCK_TYPES = frozenset((
+    "paragraph",
+    "heading_1",
+    "heading_2",
+    "heading_3",
+    "bulleted_list_item",
+    "numbered_list_item",
+))
+
+# Templates for the static blocks of every report page; callers get deep copies so a
+# caller that edits its page blocks cannot change the templates for later reports
+WELCOME_BLOCK = {
+    "object": "block",
+    "type": "callout",
+    "callout": {
+        "rich_text": [
+            {
+                "type": "text",
+                "text": {
+                    "content": "歡迎閱讀幼兒部本週主日學報告！以下是小朋友們的活動摘要和精彩時刻。"
+                }
+            }
+        ],
+        "icon": {
+            "type": "emoji",
+            "emoji": "🧸"
+        },
+        "color": "pink_background"
+    }
+}
+
+PHOTOS_HEADING_BLOCK = {
+    "object": "block",
+    "type": "heading_2",
+    "heading_2": {
+        "rich_text": [
+            {
+                "type": "text",
+                "text": {
+                    "content": "📸 小朋友活動照片集"
+                }
+            }
+        ],
+        "color": "pink_background"
+    }
+}
+
+PHOTOS_INTRO_BLOCK = {
+    "object": "block",
+    "type": "paragraph",
+    "paragraph": {
+        "rich_text": [
+            {
+                "type": "text",
+                "text": {
+                    "content": "以下是小朋友們本週活動的可愛瞬間："
+                },
+                "annotations": {
+                    "italic": True
+                }
+            }
+        ]
+    }
+}
+
+FOOTER_BLOCK = {
+    "object": "block",
+    "type": "paragraph",
+    "paragraph": {
+        "rich_text": [
+            {
+                "type": "text",
+                "text": {
+                    "content": "感謝您閱讀本週幼兒部報告！小朋友們下週見！🌈✨"
+                },
+                "annotations": {
+                    "italic": True,
+                    "bold": True,
+                    "color": "purple"
+                }
+            }
+        ],
+        "color": "default"
+    }
+}
+
+DIVIDER_BLOCK = {
+    "object": "block",
+    "type": "divider",
+    "divider": {}
+}
+
+def _paragraphs_to_lines(paragraphs: List[str]) -> List[str]:
+    """
+    Flatten report paragraphs into the line list the markdown parser expects.
+    
+    Each paragraph is split into its lines and followed by a blank line, so headings
+    and list items inside a paragraph are recognized, and the parser coalesces adjacent
+    text paragraphs (up to Notion's rich text limits) instead of joining them with a space.
+    
+    Args:
+        paragraphs: Report content split on blank lines
+        
+    Returns:
+        List of markdown lines
+    """
+    lines = []
+    for paragraph in paragraphs:
+        lines.extend(paragraph.split("\n"))
+        lines.append("")
+    return lines
+
 class NotionBlockBuilder:
     """
     Builder for Notion blocks.
@@ -36,31 +151,12 @@ class NotionBlockBuilder:
         blocks.append(self._create_divider_block())
         
         # Add a welcome callout block
-        blocks.append({
-            "object": "block",
-            "type": "callout",
-            "callout": {
-                "rich_text": [
-                    {
-                        "type": "text",
-                        "text": {
-                            "content": "歡迎閱讀幼兒部本週主日學報告！以下是小朋友們的活動摘要和精彩時刻。"
-                        }
-                    }
-                ],
-                "icon": {
-                    "type": "emoji",
-                    "emoji": "🧸"
-                },
-                "color": "pink_background"
-            }
-        })
+        blocks.append(deepcopy(WELCOME_BLOCK))
         
         # Process content with better section formatting
         if "content" in report_content and report_content["content"]:
-            from utils.markdown.parser import MarkdownParser
             markdown_parser = MarkdownParser()
-            content_blocks = markdown_parser.process_content(report_content["content"])
+            content_blocks = markdown_parser.process_content(_paragraphs_to_lines(report_content["content"]))
             blocks.extend(content_blocks)
         
         # Add images with better gallery-like formatting
@@ -69,40 +165,10 @@ class NotionBlockBuilder:
             blocks.append(self._create_divider_block())
             
             # Add a heading for the images section with emoji
-            blocks.append({
-                "object": "block",
-                "type": "heading_2",
-                "heading_2": {
-                    "rich_text": [
-                        {
-                            "type": "text",
-                            "text": {
-                                "content": "📸 小朋友活動照片集"
-                            }
-                        }
-                    ],
-                    "color": "pink_background"
-                }
-            })
+            blocks.append(deepcopy(PHOTOS_HEADING_BLOCK))
             
             # Add a brief intro to the photos
-            blocks.append({
-                "object": "block",
-                "type": "paragraph",
-                "paragraph": {
-                    "rich_text": [
-                        {
-                            "type": "text",
-                            "text": {
-                                "content": "以下是小朋友們本週活動的可愛瞬間："
-                            },
-                            "annotations": {
-                                "italic": True
-                            }
-                        }
-                    ]
-                }
-            })
+            blocks.append(deepcopy(PHOTOS_INTRO_BLOCK))
             
             # Add images
             for image_url in report_content["image_paths"]:
@@ -111,26 +177,7 @@ class NotionBlockBuilder:
         
         # Add a footer section
         blocks.append(self._create_divider_block())
-        blocks.append({
-            "object": "block",
-            "type": "paragraph",
-            "paragraph": {
-                "rich_text": [
-                    {
-                        "type": "text",
-                        "text": {
-                            "content": "感謝您閱讀本週幼兒部報告！小朋友們下週見！🌈✨"
-                        },
-                        "annotations": {
-                            "italic": True,
-                            "bold": True,
-                            "color": "purple"
-                        }
-                    }
-                ],
-                "color": "default"
-            }
-        })
+        blocks.append(deepcopy(FOOTER_BLOCK))
         
         return blocks
     
@@ -148,23 +195,27 @@ class NotionBlockBuilder:
         # Extract text and images
         content = []
         images = []
+        seen_images = set()
         
         for block in blocks:
-            if block["type"] == "paragraph":
-                # Extract text from paragraph blocks
-                text = ""
-                for rich_text in block["paragraph"]["rich_text"]:
-                    if rich_text["type"] == "text":
-                        text += rich_text["text"]["content"]
+            block_type = block["type"]
+            if block_type in TEXT_BLOCK_TYPES:
+                # Extract text from paragraph, heading and list blocks
+                rich_texts = block[block_type]["rich_text"]
+                if not rich_texts:
+                    continue
+                text = "".join(rich_text["plain_text"] for rich_text in rich_texts if rich_text.get("plain_text"))
                 if text:
                     content.append(text)
             
-            elif block["type"] == "image":
-                # Extract image URLs
-                if block["image"]["type"] == "external":
-                    images.append(block["image"]["external"]["url"])
-                elif block["image"]["type"] == "file":
-                    images.append(block["image"]["file"]["url"])
+            elif block_type == "image":
+                # Extract image URLs ("external" or "file", named by the image type),
+                # skipping duplicates so each image only produces one block downstream
+                image = block["image"]
+                url = image.get(image["type"], {}).get("url")
+                if url and url not in seen_images:
+                    seen_images.add(url)
+                    images.append(url)
         
         return {
             "title": page_data["properties"]["title"]["title"][0]["text"]["content"] if "title" in page_data["properties"] else "",
@@ -190,10 +241,10 @@ class NotionBlockBuilder:
             year, month, day = date_str.split('-')
             # Format as Chinese date
             formatted_date = f"{year}年{month}月{day}日"
-            logger.info(f"Formatted date: {formatted_date}")
+            logger.info("Formatted date: %s", formatted_date)
             return formatted_date
         except Exception as e:
-            logger.warning(f"Failed to parse date {date_str}: {str(e)}")
+            logger.warning("Failed to parse date %s: %s", date_str, e)
             return date_str  # Use as-is if parsing fails
     
     def _create_title_block(self, title: str) -> Dict[str, Any]:
@@ -263,11 +314,7 @@ class NotionBlockBuilder:
         Returns:
             A Notion divider block
         """
-        return {
-            "object": "block",
-            "type": "divider",
-            "divider": {}
-        }
+        return deepcopy(DIVIDER_BLOCK)
     
     def _create_image_block(self, image_url: str) -> Dict[str, Any]:
         """
@@ -303,7 +350,7 @@ class NotionBlockBuilder:
         elif image_url.startswith('file://'):
             # This is a local file, but we can't upload it directly
             # In a real application, we would need to upload it first
-            logger.warning(f"Local image URL not supported in Notion API: {image_url}")
+            logger.warning("Local image URL not supported in Notion API: %s", image_url)
             return {
                 "object": "block",
                 "type": "paragraph",
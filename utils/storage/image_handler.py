@@ -55,12 +55,12 @@ class ImageHandler:
         Returns:
             The URL of the uploaded image, or None if the upload failed
         """
-        logger.info(f"Uploading image: {image_path}")
+        logger.info("Uploading image: %s", image_path)
         
         try:
             # Check if the file exists
             if not os.path.exists(image_path):
-                logger.error(f"Image file not found: {image_path}")
+                logger.error("Image file not found: %s", image_path)
                 return None
             
             # Check if the storage service is available
@@ -68,10 +68,10 @@ class ImageHandler:
                 # Upload the image
                 image_url = self.storage_service.upload_image(image_path)
                 if image_url:
-                    logger.info(f"Image uploaded: {image_url}")
+                    logger.info("Image uploaded: %s", image_url)
                     return image_url
                 else:
-                    logger.warning(f"Failed to upload image, returning local path as fallback")
+                    logger.warning("Failed to upload image, returning local path as fallback")
                     # Return the local path as a fallback
                     return f"file://{image_path}"
             else:
@@ -80,6 +80,6 @@ class ImageHandler:
                 return f"file://{image_path}"
         
         except Exception as e:
-            logger.error(f"Error uploading image: {str(e)}")
+            logger.error("Error uploading image: %s", e)
             # Return the local path as a fallback
             return f"file://{image_path}" 
\ No newline at end of file